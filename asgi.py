@@ -0,0 +1,217 @@
+"""Single-process mode: the web app and the Discord bot on one asyncio event loop.
+
+The Flask routes are served through an ASGI adapter, and /api/stream is
+handled natively on the loop. The bot, the web routes and the event stream
+then share one snapshot cache, one writer and one change feed.
+
+Nothing on the loop touches SQLite directly: Flask requests run on the
+loop's thread pool, and the bot and the stream hand database calls to
+threads, so a slow write never stalls HTTP, SSE or Discord traffic.
+"""
+import asyncio
+import logging
+import os
+import queue
+import re
+import sys
+import tempfile
+
+from app import app
+from database import DatabaseManager
+from snapshot import get_change_feed, get_snapshot_store
+from web_routes import sse_event, SSE_KEEPALIVE, SSE_HEADERS, STREAM_HEARTBEAT
+
+logger = logging.getLogger(__name__)
+
+# Request bodies larger than this are spooled to disk before Flask reads them
+REQUEST_BODY_SPOOL = 1024 * 1024
+
+# /api/stream for the default tournament, /g/<guild_id>/api/stream for a guild's
+STREAM_PATH = re.compile(r'(?:/g/(\d+))?/api/stream')
+
+class LoopSubscriber:
+    """ChangeFeed subscriber that hands events to an asyncio.Queue on the serving loop"""
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def put_nowait(self, event):
+        # Called from the change feed thread
+        if self.queue.full():
+            raise queue.Full
+        self.loop.call_soon_threadsafe(self._deliver, event)
+
+    def _deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+def wsgi_environ(scope, body):
+    """PEP 3333 environ for an ASGI HTTP scope"""
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf8').decode('latin1'),
+        'PATH_INFO': path.encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+    for name, value in scope['headers']:
+        name = name.decode('latin1')
+        key = {'content-type': 'CONTENT_TYPE', 'content-length': 'CONTENT_LENGTH'}.get(name)
+        key = key or 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin1')
+        if key in environ:
+            value = environ[key] + ('; ' if key == 'HTTP_COOKIE' else ',') + value
+        environ[key] = value
+    return environ
+
+class ThreadedWsgiToAsgi:
+    """ASGI adapter that runs each Flask request on the loop's thread pool.
+
+    The request body is read on the loop. The app and its response iterable
+    then run on a worker thread, which hands each chunk back to the loop, so
+    a request waiting on a slow write never holds up the others.
+    """
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']}")
+        body = tempfile.SpooledTemporaryFile(max_size=REQUEST_BODY_SPOOL)
+        try:
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                more_body = message.get('more_body', False)
+            body.seek(0)
+            await asyncio.to_thread(self.run_wsgi_app, wsgi_environ(scope, body), send, asyncio.get_running_loop())
+        finally:
+            body.close()
+
+    def run_wsgi_app(self, environ, send, loop):
+        """Call the WSGI app on a worker thread, sending its response through the loop"""
+        response_start = None
+        started = False
+
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            nonlocal response_start
+            if exc_info and started:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers],
+            }
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            for chunk in result:
+                if not started:
+                    send_sync(response_start)
+                    started = True
+                send_sync({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        if not started:
+            send_sync(response_start)
+        send_sync({'type': 'http.response.body', 'body': b''})
+
+class TournamentASGI:
+    """ASGI application: native async event stream, everything else via Flask"""
+
+    def __init__(self, flask_app):
+        self.wsgi = ThreadedWsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        db_manager = None
+        stream = STREAM_PATH.fullmatch(scope['path']) if scope['type'] == 'http' else None
+        if stream:
+            # Unknown guilds fall through to Flask, which answers 404
+            guild_id = int(stream.group(1)) if stream.group(1) else None
+            db_manager = await asyncio.to_thread(DatabaseManager.for_tenant, guild_id, create=False)
+        if db_manager is not None:
+            await self.stream(get_snapshot_store(db_manager), receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def stream(self, snapshots, receive, send):
+        change_feed = get_change_feed(snapshots)
+        subscriber = change_feed.subscribe(LoopSubscriber(asyncio.get_running_loop(), change_feed.queue_size))
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        # Waited on alongside the next change, so a viewer leaving is unsubscribed at once
+        watcher = asyncio.create_task(watch_disconnect())
+        next_change = None
+        headers = [(b'content-type', b'text/event-stream')]
+        headers += [(name.lower().encode(), value.encode()) for name, value in SSE_HEADERS.items()]
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+            message = sse_event('hello', {'version': (await asyncio.to_thread(snapshots.current)).version})
+            while subscriber in change_feed:
+                await send({'type': 'http.response.body', 'body': message.encode(), 'more_body': True})
+                if next_change is None:
+                    next_change = asyncio.create_task(subscriber.queue.get())
+                done, _ = await asyncio.wait({next_change, watcher}, timeout=STREAM_HEARTBEAT,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if watcher in done:
+                    break
+                if next_change in done:
+                    change = next_change.result()
+                    next_change = None
+                    message = sse_event('change', change, change['version'])
+                else:
+                    message = SSE_KEEPALIVE
+        finally:
+            watcher.cancel()
+            if next_change is not None:
+                next_change.cancel()
+            change_feed.unsubscribe(subscriber)
+
+async def run_single_process():
+    """Run the web server and the Discord bot together on the current event loop"""
+    import uvicorn
+    from bot import bot
+
+    token = os.getenv('DISCORD_BOT_TOKEN')
+    config = uvicorn.Config(TournamentASGI(app), host='0.0.0.0', port=int(os.getenv('PORT', 5000)),
+                            log_level='info')
+    server = uvicorn.Server(config)
+
+    tasks = [server.serve()]
+    if token:
+        tasks.append(bot.start(token))
+    else:
+        logger.error("DISCORD_BOT_TOKEN environment variable not set! Serving the web app only.")
+
+    async with bot:
+        await asyncio.gather(*tasks)
@@ -0,0 +1,129 @@
+import gzip
+import hashlib
+import logging
+import os
+from mimetypes import guess_type
+
+from flask import request, abort
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+COMPRESSIBLE_TYPES = {'text/html', 'application/json', 'text/css', 'application/javascript'}
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+# ETag suffix per content encoding, so each byte representation has its own strong ETag
+ETAG_SUFFIXES = {'gzip': '-gz', 'br': '-br'}
+
+def compress(data, encoding):
+    """Compress bytes with the given content encoding"""
+    if encoding == 'br':
+        return brotli.compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+def negotiate_encoding():
+    """Pick the best content encoding the client accepts"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+class StaticAsset:
+    """A static file held in memory with its fingerprint and precompressed bodies"""
+
+    def __init__(self, filename, data, mimetype):
+        self.filename = filename
+        self.data = data
+        self.mimetype = mimetype
+        self.fingerprint = hashlib.sha256(data).hexdigest()[:12]
+        self.encoded = {}
+        if mimetype in COMPRESSIBLE_TYPES and len(data) >= MIN_COMPRESS_SIZE:
+            self.encoded['gzip'] = compress(data, 'gzip')
+            if brotli is not None:
+                self.encoded['br'] = compress(data, 'br')
+
+class AssetCache:
+    """Loads static files once, fingerprints them and keeps compressed copies"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self._assets = {}
+
+    def get(self, filename):
+        asset = self._assets.get(filename)
+        if asset is None:
+            path = os.path.realpath(os.path.join(self.static_folder, filename))
+            if not path.startswith(os.path.realpath(self.static_folder) + os.sep) or not os.path.isfile(path):
+                return None
+            mimetype = guess_type(path)[0] or 'application/octet-stream'
+            with open(path, 'rb') as f:
+                asset = StaticAsset(filename, f.read(), mimetype)
+            self._assets[filename] = asset
+        return asset
+
+def init_assets(app):
+    """Register fingerprinted static asset serving and response compression"""
+    cache = AssetCache(app.static_folder)
+
+    def asset_url(filename):
+        """URL of a static file that changes whenever the file's content does"""
+        asset = cache.get(filename)
+        if asset is None:
+            logger.warning(f"Unknown static asset: {filename}")
+            return app.url_for('static', filename=filename)
+        return app.url_for('fingerprinted_asset', fingerprint=asset.fingerprint, filename=filename)
+
+    @app.context_processor
+    def asset_helpers():
+        return {'asset_url': asset_url}
+
+    @app.route('/assets/<fingerprint>/<path:filename>')
+    def fingerprinted_asset(fingerprint, filename):
+        """Serve a fingerprinted static file with long-lived caching"""
+        asset = cache.get(filename)
+        if asset is None or asset.fingerprint != fingerprint:
+            abort(404)
+
+        encoding = negotiate_encoding()
+        body = asset.encoded.get(encoding) if encoding else None
+        response = app.response_class(body or asset.data, mimetype=asset.mimetype)
+        if body is not None:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE
+        response.set_etag(asset.fingerprint + (ETAG_SUFFIXES[encoding] if body is not None else ''))
+        response.vary.add('Accept-Encoding')
+        return response.make_conditional(request)
+
+    @app.after_request
+    def compress_response(response):
+        """Compress HTML and JSON bodies for clients that accept it"""
+        if (response.mimetype not in COMPRESSIBLE_TYPES
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.status_code < 200
+                or response.status_code in (204, 304)):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding()
+        data = response.get_data()
+        if encoding is None or len(data) < MIN_COMPRESS_SIZE:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag is not None:
+            response.set_etag(etag + ETAG_SUFFIXES[encoding], weak)
+        return response
+
+    return cache
@@ -0,0 +1,105 @@
+"""Burst-load check for /api/stats and /api/leaderboard request coalescing.
+
+Fires a burst of concurrent identical requests right after a write and
+counts the DatabaseManager queries and JSON body builds they cause. Each
+burst is run twice: through SingleFlight, and with SingleFlight bypassed
+so every cache miss builds its own body. Snapshot-backed paths are also
+coalesced by the snapshot rebuild lock, so their query counts barely move;
+the kd-sorted leaderboard reads the database directly and shows both.
+
+Exits with status 1 if any request fails, or if a coalesced burst builds
+anything other than exactly one body.
+
+Usage: python benchmarks/api_burst.py [concurrency] [bursts]
+"""
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# DatabaseManager opens tournament.db relative to the working directory
+os.chdir(tempfile.mkdtemp())
+
+from app import app
+import web_routes
+
+QUERIES = ("get_all_players", "get_recent_matches", "get_leaderboard")
+PATHS = ("/api/stats", "/api/leaderboard?limit=50", "/api/leaderboard?limit=50&sort=kd")
+
+def count_queries(db):
+    counts = Counter()
+    for name in QUERIES:
+        original = getattr(db, name)
+        def counted(*args, _name=name, _original=original, **kwargs):
+            counts[_name] += 1
+            return _original(*args, **kwargs)
+        setattr(db, name, counted)
+    return counts
+
+def count_builds(counts):
+    """Count JSON bodies built by json_response, one per SingleFlight leader (or per miss when bypassed)"""
+    original = web_routes.encode_json
+    def counted(data):
+        counts['builds'] += 1
+        return original(data)
+    web_routes.encode_json = counted
+
+class Uncoalesced:
+    """Stand-in for SingleFlight that runs every call itself"""
+    def do(self, key, fn):
+        return fn()
+
+def burst(client_factory, path, concurrency):
+    barrier = threading.Barrier(concurrency)
+    statuses = Counter()
+    def worker():
+        client = client_factory()
+        barrier.wait()
+        statuses[client.get(path).status_code] += 1
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return statuses
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    bursts = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    db = web_routes.db_manager
+    for i in range(200):
+        db.add_player(i, f"Player {i}", f"player{i}")
+    counts = count_queries(db)
+    builds = Counter()
+    count_builds(builds)
+    flight = web_routes.api_flight
+    failures = []
+
+    for path in PATHS:
+        for label, coalescer in (("singleflight", flight), ("bypassed", Uncoalesced())):
+            web_routes.api_flight = coalescer
+            counts.clear()
+            builds.clear()
+            statuses = Counter()
+            for n in range(bursts):
+                # Each write moves the data version, so every burst starts cold
+                db.update_match_result(n % 200, (n + 1) % 200, "player1_win", 2, 1, 1, 2)
+                statuses.update(burst(app.test_client, path, concurrency))
+            print(f"{path:<36} {label:<13} {sum(statuses.values())} requests  {sum(counts.values()):>4} DB queries  "
+                  f"{builds['builds']:>4} body builds  {dict(counts)}")
+            if set(statuses) != {200}:
+                failures.append(f"{path} ({label}): responses {dict(statuses)}")
+            if coalescer is flight and builds['builds'] != bursts:
+                failures.append(f"{path}: {builds['builds']} body builds for {bursts} bursts, expected one each")
+    web_routes.api_flight = flight
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Compare bot memory and startup time under the full and lowmem profiles.
+
+Each profile is started in a fresh process with DISCORD_BOT_TOKEN from the
+environment. The child reports time-to-ready and RSS once the bot is ready
+and has settled, then disconnects.
+
+Children run in a temporary directory, so they open a throwaway database
+rather than tournament.db. Their on_ready is replaced, so no commands are
+synced and the outbox, rollup and maintenance workers never start: a
+benchmark run cannot DM users or write to real data.
+
+Usage: DISCORD_BOT_TOKEN=... python benchmarks/bot_profiles.py [settle_seconds]
+"""
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES = ("full", "lowmem")
+
+def rss_mb():
+    """Current resident set size, falling back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def child(settle):
+    sys.path.insert(0, ROOT)
+    start = time.perf_counter()
+    import bot as bot_module
+    bot = bot_module.bot
+    result = {}
+
+    @bot.event
+    async def on_ready():
+        # Replaces the bot's handler: no command sync, no background workers
+        pass
+
+    async def report_when_ready():
+        await bot.wait_until_ready()
+        result["ready_seconds"] = time.perf_counter() - start
+        result["ready_rss_mb"] = rss_mb()
+        await asyncio.sleep(settle)
+        result["settled_rss_mb"] = rss_mb()
+        result["guilds"] = len(bot.guilds)
+        result["cached_members"] = sum(len(guild.members) for guild in bot.guilds)
+        await bot.close()
+
+    async def main():
+        async with bot:
+            asyncio.create_task(report_when_ready())
+            await bot.start(os.environ["DISCORD_BOT_TOKEN"])
+
+    asyncio.run(main())
+    print(json.dumps(result))
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        return child(float(sys.argv[2]))
+    if not os.getenv("DISCORD_BOT_TOKEN"):
+        sys.exit("DISCORD_BOT_TOKEN is required")
+    settle = sys.argv[1] if len(sys.argv) > 1 else "10"
+
+    print(f"{'profile':<8} {'ready (s)':>10} {'RSS ready (MB)':>15} {'RSS settled (MB)':>17} {'members':>8}")
+    for profile in PROFILES:
+        # Relative paths keep tenant shards and backups inside the child's directory too
+        env = dict(os.environ, BOT_PROFILE=profile, TENANT_DIR="tenants", BACKUP_DIR="backups")
+        with tempfile.TemporaryDirectory(prefix="duel-lords-profile-") as workdir:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", settle], env=env,
+                                 cwd=workdir, capture_output=True, text=True, check=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{profile:<8} {r['ready_seconds']:>10.2f} {r['ready_rss_mb']:>15.1f} "
+              f"{r['settled_rss_mb']:>17.1f} {r['cached_members']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Cost of serving the top-N head-to-head matrix.
+
+Loads players and random matches, rebuilds the head_to_head table the way
+reconcile repair does, then times reading the matrix for the top players
+from it against grouping the whole matches table per request.
+
+Usage: python benchmarks/head_to_head.py [players] [matches] [top_n]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import MATCH_SIDES_SQL, DatabaseManager
+
+PLAYER_ID_BASE = 10**17
+
+def generate(db_path, players, matches):
+    DatabaseManager(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO players (discord_id, player_name, discord_name) VALUES (?, ?, ?)",
+        [(str(PLAYER_ID_BASE + i), f"Player {i}", f"player{i}") for i in range(players)]
+    )
+    rows = []
+    for _ in range(matches):
+        # Skewed pairings, so the top players have met each other often
+        a, b = random.sample(range(min(players, 200)) if random.random() < 0.5 else range(players), 2)
+        winner = random.choice((a, b, None))
+        rows.append((str(PLAYER_ID_BASE + a), str(PLAYER_ID_BASE + b),
+                     None if winner is None else str(PLAYER_ID_BASE + winner),
+                     random.randrange(10), random.randrange(10), random.randrange(10), random.randrange(10)))
+    conn.executemany('''
+        INSERT INTO matches (player1_id, player2_id, winner_id, player1_kills, player1_deaths,
+                             player2_kills, player2_deaths, season_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+def grouped(conn, ids):
+    """The matrix computed ad hoc from matches"""
+    sides = MATCH_SIDES_SQL.format(where='WHERE player1_id IN ({0}) AND player2_id IN ({0})'.format(
+        ', '.join('?' * len(ids))))
+    return conn.execute(f'''
+        SELECT discord_id, opponent_id, COUNT(*), SUM(wins), SUM(losses), SUM(draws), SUM(kills) - SUM(deaths)
+        FROM ({sides}) GROUP BY discord_id, opponent_id
+    ''', ids * 4).fetchall()
+
+def timed(label, run, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        samples.append(time.perf_counter() - start)
+    print(f"{label:<28} best {min(samples) * 1000:8.3f}ms  ({len(result)} pair rows)")
+    return min(samples)
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    matches = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    top_n = int(sys.argv[3]) if len(sys.argv) > 3 else 25
+    db_path = os.path.join(tempfile.mkdtemp(), "tournament.db")
+    generate(db_path, players, matches)
+    db = DatabaseManager(db_path)
+
+    start = time.perf_counter()
+    db.reconcile_stats(repair=True)
+    print(f"{players} players, {matches} matches: stats and head-to-head rebuilt in "
+          f"{(time.perf_counter() - start) * 1000:.0f}ms")
+
+    ids = [row['discord_id'] for row in db.get_leaderboard(top_n)]
+    precomputed = timed("head_to_head lookups", lambda: db.get_head_to_head(ids), 20)
+    conn = sqlite3.connect(db_path)
+    adhoc = timed("GROUP BY over matches", lambda: grouped(conn, ids), 5)
+    print(f"  -> precomputed is {adhoc / precomputed:.0f}x faster")
+
+if __name__ == "__main__":
+    main()
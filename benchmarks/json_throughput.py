@@ -0,0 +1,75 @@
+"""Requests per second of the JSON API with and without cached encoded bodies.
+
+Each endpoint is served twice from the same data: through the app's cached
+route, and through an equivalent route registered here that rebuilds the
+payload with jsonify on every request, as the API did before bodies were
+cached. Requests go through the Flask test client, with and without gzip.
+
+Usage: python benchmarks/json_throughput.py [players] [seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# DatabaseManager opens tournament.db relative to the working directory
+os.chdir(tempfile.mkdtemp())
+
+from flask import jsonify
+from app import app
+import web_routes
+
+def jsonify_stats():
+    snapshot = web_routes.snapshots.current()
+    return jsonify({
+        'total_players': snapshot.total_players,
+        'recent_matches': snapshot.latest_matches(10),
+        'top_players': snapshot.top_players(10),
+        'server_ip': '18.228.228.44',
+        'server_port': '3827'
+    })
+
+def jsonify_leaderboard():
+    return jsonify({'players': web_routes.snapshots.current().top_players(100)})
+
+app.add_url_rule('/bench/jsonify/stats', 'bench_jsonify_stats', jsonify_stats)
+app.add_url_rule('/bench/jsonify/leaderboard', 'bench_jsonify_leaderboard', jsonify_leaderboard)
+
+CASES = (
+    ("/api/stats", "/bench/jsonify/stats", "/api/stats"),
+    ("/api/leaderboard?limit=100", "/bench/jsonify/leaderboard", "/api/leaderboard?limit=100"),
+)
+
+def requests_per_second(client, path, headers, seconds):
+    client.get(path, headers=headers)
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        assert client.get(path, headers=headers).status_code == 200
+        count += 1
+    return count / seconds
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    db = web_routes.db_manager
+    db.add_players((i, f"Player {i}", f"player{i}") for i in range(players))
+    for i in range(200):
+        db.update_match_result(i % players, (i + 1) % players, "player1_win", 3, 1, 1, 3)
+
+    encoder = "orjson" if web_routes.orjson is not None else "json"
+    print(f"{players} players, encoder: {encoder}")
+    client = app.test_client()
+    for label, before, after in CASES:
+        for encoding in (None, "gzip"):
+            headers = {"Accept-Encoding": encoding} if encoding else {}
+            old = requests_per_second(client, before, headers, seconds)
+            new = requests_per_second(client, after, headers, seconds)
+            print(f"{label:<28} {encoding or 'identity':<9} jsonify {old:>8.0f} req/s  "
+                  f"cached {new:>8.0f} req/s  ({new / old:.1f}x)")
+
+if __name__ == "__main__":
+    main()
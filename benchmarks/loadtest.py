@@ -0,0 +1,227 @@
+"""Offline load tests for the web routes and the bot command handlers.
+
+Generates a dataset in a temporary database, then drives either the Flask
+app over HTTP or the slash command callbacks with fake interactions at a
+configurable concurrency, and reports throughput, latency percentiles and
+error rates.
+
+Usage:
+    python benchmarks/loadtest.py web [--paths /api/leaderboard,/api/stats] [--url http://host:port]
+    python benchmarks/loadtest.py bot [--commands update_stats,leaderboard,stats]
+
+Common options: --players N --matches N --concurrency N --requests N
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# DatabaseManager() opens tournament.db relative to the working directory;
+# the directory is removed when main() finishes
+ORIGINAL_CWD = os.getcwd()
+WORKDIR = tempfile.TemporaryDirectory(prefix="duel-lords-load-", ignore_cleanup_errors=True)
+os.chdir(WORKDIR.name)
+
+PLAYER_ID_BASE = 10**17
+
+def generate_dataset(players, matches):
+    """Fill tournament.db with players and matches, then rebuild counters from the matches"""
+    from database import DatabaseManager
+    db = DatabaseManager("tournament.db")
+    conn = sqlite3.connect("tournament.db")
+    conn.executemany(
+        "INSERT INTO players (discord_id, player_name, discord_name) VALUES (?, ?, ?)",
+        [(str(PLAYER_ID_BASE + i), f"Player {i}", f"player{i}") for i in range(players)]
+    )
+    rows = []
+    for _ in range(matches):
+        a, b = random.sample(range(players), 2)
+        p1, p2 = str(PLAYER_ID_BASE + a), str(PLAYER_ID_BASE + b)
+        rows.append((p1, p2, random.choice([p1, p2, None]), *(random.randrange(6) for _ in range(4))))
+    conn.executemany(
+        "INSERT INTO matches (player1_id, player2_id, winner_id, player1_kills, player1_deaths, "
+        "player2_kills, player2_deaths, season_id) VALUES (?, ?, ?, ?, ?, ?, ?, 1)", rows
+    )
+    conn.commit()
+    conn.close()
+    db.reconcile_stats(repair=True)
+    return db
+
+class Results:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self.lock:
+            self.latencies.append(seconds)
+            if not ok:
+                self.errors += 1
+
+    def report(self, label, elapsed):
+        total = len(self.latencies)
+        if not total:
+            print(f"{label}: no requests completed")
+            return
+        ms = sorted(l * 1000 for l in self.latencies)
+        pct = lambda p: ms[min(int(p / 100 * total), total - 1)]
+        print(f"{label:<44} {total / elapsed:>9.1f} req/s  p50 {pct(50):>7.2f}ms  p95 {pct(95):>7.2f}ms  "
+              f"p99 {pct(99):>7.2f}ms  mean {statistics.fmean(ms):>7.2f}ms  errors {self.errors / total:.2%}")
+
+def start_local_server():
+    """Serve the Flask app from a background thread and return its base URL"""
+    from werkzeug.serving import make_server
+    from app import app
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+def run_web(args):
+    base_url = args.url or start_local_server()
+    for path in args.paths.split(","):
+        results = Results()
+
+        def hit(_):
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base_url + path, timeout=30) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (urllib.error.URLError, OSError):
+                ok = False
+            results.record(time.perf_counter() - start, ok)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(hit, range(args.requests)))
+        results.report(f"GET {path}", time.perf_counter() - start)
+
+class FakeMember:
+    """Just enough of discord.Member for the command handlers"""
+    def __init__(self, user_id, administrator=False):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+        self.display_name = f"user{user_id}"
+        self.avatar = None
+        self.guild_permissions = type("Permissions", (), {"administrator": administrator})()
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send_message(self, *args, embed=None, **kwargs):
+        self.interaction.embeds.append(embed)
+
+    async def defer(self, *args, **kwargs):
+        pass
+
+class FakeInteraction:
+    """Stands in for discord.Interaction; records the embeds a handler sends"""
+    def __init__(self, user):
+        self.user = user
+        self.guild_id = None
+        self.locale = "en-US"
+        self.embeds = []
+        self.response = FakeResponse(self)
+        self.followup = type("Followup", (), {"send": self.response.send_message})()
+
+    @property
+    def failed(self):
+        return any(embed is not None and embed.title.startswith("❌") for embed in self.embeds)
+
+def bot_invocations(players):
+    """Argument builders for each simulated command"""
+    def pair():
+        a, b = random.sample(range(players), 2)
+        return FakeMember(PLAYER_ID_BASE + a), FakeMember(PLAYER_ID_BASE + b)
+
+    def update_stats():
+        p1, p2 = pair()
+        return (p1, p2, random.choice(["player1_win", "player2_win", "draw"]),
+                *(random.randrange(6) for _ in range(4)))
+
+    return {
+        "update_stats": update_stats,
+        "leaderboard": lambda: (),
+        "stats": lambda: (pair()[0],),
+        "players": lambda: (),
+    }
+
+def run_bot(args):
+    import bot as bot_module
+    invocations = bot_invocations(args.players)
+    admin = FakeMember(1, administrator=True)
+
+    async def drive(name):
+        command = bot_module.bot.tree.get_command(name)
+        build_args = invocations[name]
+        results = Results()
+        remaining = iter(range(args.requests))
+
+        async def worker():
+            for _ in remaining:
+                interaction = FakeInteraction(admin)
+                start = time.perf_counter()
+                try:
+                    await command.callback(interaction, *build_args())
+                    ok = not interaction.failed
+                except Exception:
+                    ok = False
+                results.record(time.perf_counter() - start, ok)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        results.report(f"/{name}", time.perf_counter() - start)
+
+    async def main():
+        # Handlers hand their database calls to the default executor; size it
+        # so every simulated admin can have a call in flight at once
+        executor = ThreadPoolExecutor(args.concurrency)
+        asyncio.get_running_loop().set_default_executor(executor)
+        for name in args.commands.split(","):
+            await drive(name)
+
+    asyncio.run(main())
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the web routes or the bot command handlers")
+    parser.add_argument("target", choices=["web", "bot"])
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--matches", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--url", help="load an already running server instead of a local one")
+    parser.add_argument("--paths", default="/api/leaderboard,/api/leaderboard?sort=kd&min_matches=5,/api/stats,/leaderboard")
+    parser.add_argument("--commands", default="update_stats,leaderboard,stats")
+    args = parser.parse_args()
+
+    try:
+        if not args.url:
+            start = time.perf_counter()
+            generate_dataset(args.players, args.matches)
+            print(f"Generated {args.players} players / {args.matches} matches in "
+                  f"{time.perf_counter() - start:.1f}s ({WORKDIR.name})")
+
+        if args.target == "web":
+            run_web(args)
+        else:
+            run_bot(args)
+    finally:
+        os.chdir(ORIGINAL_CWD)
+        WORKDIR.cleanup()
+
+if __name__ == "__main__":
+    main()
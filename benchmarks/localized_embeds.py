@@ -0,0 +1,88 @@
+"""Cost of building a localized embed versus a hardcoded English one.
+
+Builds the /stats embed the way the bot did with hardcoded strings, the way
+it does now (language from the preferences cache, then the pre-resolved
+template for that language rendered through discord.Embed.from_dict), and
+with a database lookup and catalog lookups per response for comparison.
+
+Usage: python benchmarks/localized_embeds.py [iterations]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import discord
+
+from database import DatabaseManager
+from translations import LanguagePreferences, get_translation, render_embed
+
+STATS = {'player_name': 'Player 1', 'wins': 12, 'losses': 7, 'draws': 2, 'kills': 40, 'deaths': 25,
+         'kd_ratio': 1.6, 'total_matches': 21, 'win_rate': 57.14, 'points': 38}
+
+def hardcoded(stats):
+    embed = discord.Embed(
+        title="📊 Tournament Statistics",
+        description=f"Statistics for **{stats['player_name']}**",
+        color=0x0099ff
+    )
+    embed.add_field(name="🏆 Wins", value=f"`{stats['wins']}`", inline=True)
+    embed.add_field(name="💔 Losses", value=f"`{stats['losses']}`", inline=True)
+    embed.add_field(name="🤝 Draws", value=f"`{stats['draws']}`", inline=True)
+    embed.add_field(name="⚔️ Kills", value=f"`{stats['kills']}`", inline=True)
+    embed.add_field(name="💀 Deaths", value=f"`{stats['deaths']}`", inline=True)
+    embed.add_field(name="📈 K/D Ratio", value=f"`{stats['kd_ratio']:.2f}`", inline=True)
+    embed.add_field(name="🎯 Total Matches", value=f"`{stats['total_matches']}`", inline=True)
+    embed.add_field(name="📊 Win Rate", value=f"`{stats['win_rate']:.1f}%`", inline=True)
+    embed.add_field(name="🏅 Points", value=f"`{stats['points']}`", inline=True)
+    embed.set_footer(text="Duel Lords Tournament • /leaderboard for rankings")
+    return embed
+
+def uncached(db, user_id, stats):
+    """Localizing without the preferences cache or compiled templates"""
+    language = db.get_user_language(user_id) or 'en'
+    t = lambda key: get_translation(key, language)
+    embed = discord.Embed(
+        title=f"📊 {t('player_stats')}",
+        description=f"{t('statistics_for').format(player_name=stats['player_name'])}",
+        color=0x0099ff
+    )
+    embed.add_field(name=f"🏆 {t('wins')}", value=f"`{stats['wins']}`", inline=True)
+    embed.add_field(name=f"💔 {t('losses')}", value=f"`{stats['losses']}`", inline=True)
+    embed.add_field(name=f"🤝 {t('draws')}", value=f"`{stats['draws']}`", inline=True)
+    embed.add_field(name=f"⚔️ {t('kills')}", value=f"`{stats['kills']}`", inline=True)
+    embed.add_field(name=f"💀 {t('deaths')}", value=f"`{stats['deaths']}`", inline=True)
+    embed.add_field(name=f"📈 {t('kd_ratio')}", value=f"`{stats['kd_ratio']:.2f}`", inline=True)
+    embed.add_field(name=f"🎯 {t('total_matches')}", value=f"`{stats['total_matches']}`", inline=True)
+    embed.add_field(name=f"📊 {t('win_rate')}", value=f"`{stats['win_rate']:.1f}%`", inline=True)
+    embed.add_field(name=f"🏅 {t('points')}", value=f"`{stats['points']}`", inline=True)
+    embed.set_footer(text=f"Duel Lords Tournament • {t('see_leaderboard')}")
+    return embed
+
+def localized(languages, user_id, stats):
+    language = languages.get(user_id, 'pt-BR')
+    return discord.Embed.from_dict(render_embed('player_stats', language, **stats))
+
+def timed(label, build, iterations):
+    # Best of five runs, to keep scheduler noise out of the comparison
+    per_call = min(timeit.repeat(build, number=iterations, repeat=5)) / iterations * 1e6
+    print(f"{label:<36} {per_call:7.2f}µs per embed (to_dict {len(str(build().to_dict()))} chars)")
+    return per_call
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    db = DatabaseManager(os.path.join(tempfile.mkdtemp(), "tournament.db"))
+    languages = LanguagePreferences(db)
+    languages.set(1, 'pt')
+
+    before = timed("hardcoded English", lambda: hardcoded(STATS), iterations)
+    after = timed("cached language + template (pt)", lambda: localized(languages, 1, STATS), iterations)
+    timed("locale fallback + template", lambda: localized(languages, 2, STATS), iterations)
+    naive = timed("DB lookup + get_translation (pt)", lambda: uncached(db, 1, STATS), max(iterations // 20, 100))
+    print(f"  -> localized / hardcoded: {after / before:.2f}x, uncached / hardcoded: {naive / before:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Latency of opponent suggestions from the in-memory matchmaking index.
+
+Loads players with random points and a week of random matches, builds the
+index once, then times suggest() for random players and compares it with
+the equivalent SQL query (closest points, excluding recent opponents).
+
+Usage: python benchmarks/matchmaking.py [players] [recent_matches] [lookups]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import DatabaseManager
+from snapshot import get_snapshot_store
+
+PLAYER_ID_BASE = 10**17
+
+def generate(db_path, players, matches):
+    DatabaseManager(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO players (discord_id, player_name, discord_name, points) VALUES (?, ?, ?, ?)",
+        [(str(PLAYER_ID_BASE + i), f"Player {i}", f"player{i}", random.randrange(5000)) for i in range(players)]
+    )
+    rows = []
+    for _ in range(matches):
+        a, b = random.sample(range(players), 2)
+        rows.append((str(PLAYER_ID_BASE + a), str(PLAYER_ID_BASE + b)))
+    conn.executemany("INSERT INTO matches (player1_id, player2_id, season_id) VALUES (?, ?, 1)", rows)
+    conn.commit()
+    conn.close()
+
+def sql_suggest(conn, discord_id, limit):
+    return conn.execute('''
+        SELECT discord_id, player_name, points FROM players
+        WHERE discord_id != :id AND discord_id NOT IN (
+            SELECT player2_id FROM matches WHERE player1_id = :id AND match_date >= datetime('now', '-7 days')
+            UNION SELECT player1_id FROM matches WHERE player2_id = :id AND match_date >= datetime('now', '-7 days')
+        )
+        ORDER BY abs(points - (SELECT points FROM players WHERE discord_id = :id))
+        LIMIT :limit
+    ''', {'id': discord_id, 'limit': limit}).fetchall()
+
+def percentiles(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {p: ms[min(int(p / 100 * len(ms)), len(ms) - 1)] for p in (50, 99)}
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    matches = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    lookups = int(sys.argv[3]) if len(sys.argv) > 3 else 10_000
+    db_path = os.path.join(tempfile.mkdtemp(), "tournament.db")
+    generate(db_path, players, matches)
+    db = DatabaseManager(db_path)
+    store = get_snapshot_store(db)
+
+    start = time.perf_counter()
+    index = store.matchmaking()
+    print(f"{players} players, {matches} recent matches: index built in "
+          f"{(time.perf_counter() - start) * 1000:.0f}ms")
+
+    ids = [str(PLAYER_ID_BASE + random.randrange(players)) for _ in range(lookups)]
+    samples = []
+    for discord_id in ids:
+        start = time.perf_counter()
+        index.suggest(discord_id, 5)
+        samples.append(time.perf_counter() - start)
+    p = percentiles(samples)
+    print(f"index suggest()  p50 {p[50]:.4f}ms  p99 {p[99]:.4f}ms")
+
+    conn = sqlite3.connect(db_path)
+    samples = []
+    for discord_id in ids[:max(lookups // 100, 10)]:
+        start = time.perf_counter()
+        sql_suggest(conn, discord_id, 5)
+        samples.append(time.perf_counter() - start)
+    p = percentiles(samples)
+    print(f"SQL query        p50 {p[50]:.4f}ms  p99 {p[99]:.4f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Memory and time of dict rows versus projected compact rows.
+
+Loads a players table and a matches table, then reads them both ways: the
+old ``SELECT *`` with one dict per row, and the projected row types the
+DatabaseManager reads return now. Reports the memory retained by the
+result list and the time to build it.
+
+Usage: python benchmarks/row_memory.py [rows]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import DatabaseManager, PLAYER_COLUMNS
+
+def generate(db_path, rows):
+    DatabaseManager(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO players (discord_id, player_name, discord_name, wins, losses, kills, deaths, points) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [(str(10**17 + i), f"Player {i}", f"player{i}", *(random.randrange(50) for _ in range(5)))
+         for i in range(rows)]
+    )
+    conn.executemany(
+        "INSERT INTO matches (player1_id, player2_id, winner_id, player1_kills, season_id) VALUES (?, ?, ?, ?, 1)",
+        [(str(10**17 + i % rows), str(10**17 + (i + 1) % rows), str(10**17 + i % rows), random.randrange(6))
+         for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+def dict_players(db):
+    with db.get_db_connection() as conn:
+        return [dict(row) for row in conn.execute('SELECT * FROM players ORDER BY created_at')]
+
+def dict_matches(db, limit):
+    with db.get_db_connection() as conn:
+        return [dict(row) for row in conn.execute('''
+            SELECT m.*, p1.player_name as player1_name, p2.player_name as player2_name,
+                   pw.player_name as winner_name
+            FROM matches m
+            JOIN players p1 ON m.player1_id = p1.discord_id
+            JOIN players p2 ON m.player2_id = p2.discord_id
+            LEFT JOIN players pw ON m.winner_id = pw.discord_id
+            ORDER BY m.match_date DESC, m.id DESC
+            LIMIT ?
+        ''', (limit,))]
+
+def measure(label, read):
+    read()  # warm the page cache and the row type
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = read()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<44} {len(result):>7} rows  retained {retained / 2**20:7.1f} MiB  "
+          f"peak {peak / 2**20:7.1f} MiB  {elapsed * 1000:7.1f}ms")
+    return retained
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    db_path = os.path.join(tempfile.mkdtemp(), "tournament.db")
+    generate(db_path, rows)
+    db = DatabaseManager(db_path)
+
+    cases = [
+        ("players", lambda: dict_players(db), lambda: db.get_all_players()),
+        ("players (name, matches)", lambda: dict_players(db),
+         lambda: db.get_all_players(columns=('player_name', 'total_matches'))),
+        ("leaderboard", lambda: dict_players(db)[:rows],
+         lambda: db.get_leaderboard(rows, columns=PLAYER_COLUMNS)),
+        ("recent matches", lambda: dict_matches(db, rows), lambda: db.get_recent_matches(rows)),
+    ]
+    for name, old, new in cases:
+        before = measure(f"{name}: SELECT * as dicts", old)
+        after = measure(f"{name}: projected rows", new)
+        print(f"  -> {before / max(after, 1):.1f}x less memory retained\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark SQLite write contention: per-call connections vs the shared writer.
+
+Usage: python benchmarks/write_contention.py [threads] [writes_per_thread]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+
+PLAYERS = 50
+
+def seed(db):
+    for i in range(PLAYERS):
+        db.add_player(i, f"Player {i}", f"player{i}")
+
+def direct_update(db_path, p1, p2):
+    """The pre-queue write path: own connection and own commit, connected like the old get_db_connection"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('UPDATE players SET wins = wins + 1, points = points + 3 WHERE discord_id = ?', (str(p1),))
+        cursor.execute('UPDATE players SET losses = losses + 1 WHERE discord_id = ?', (str(p2),))
+        cursor.execute('INSERT INTO matches (player1_id, player2_id, winner_id) VALUES (?, ?, ?)',
+                       (str(p1), str(p2), str(p1)))
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+def run(label, threads, writes, write):
+    errors = []
+    def worker(n):
+        for i in range(writes):
+            try:
+                p1 = n % PLAYERS
+                if not write(p1, (p1 + 1 + i % (PLAYERS - 1)) % PLAYERS):
+                    errors.append(None)
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    total = threads * writes
+    print(f"{label:<14} {total / elapsed:>10.0f} writes/s  {len(errors):>6} failed of {total}")
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, "before.db")
+        seed(DatabaseManager(before_path))
+        run("direct", threads, writes, lambda p1, p2: direct_update(before_path, p1, p2))
+
+        db = DatabaseManager(os.path.join(tmp, "after.db"))
+        seed(db)
+        run("write-queue", threads, writes,
+            lambda p1, p2: db.update_match_result(p1, p2, "player1_win", 1, 0, 0, 1))
+        db.writer.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,99 +1,240 @@
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
 import os
+import hashlib
+import json
 import logging
 import asyncio
+import time
+from typing import Optional
 from datetime import datetime, timedelta
-from database import DatabaseManager
-from translations import get_translation
+from database import DatabaseManager, LEADERBOARD_SORTS, MATCH_RESULTS, RECENT_OPPONENT_DAYS, STAT_COLUMNS, parse_player_csv
+from snapshot import get_snapshot_store
+from maintenance import MaintenanceScheduler
+import tracing
+from translations import CATALOGS, LanguagePreferences, catalog, render_embed
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Bot configuration
-intents = discord.Intents.default()
-intents.message_content = True
-intents.guilds = True
-intents.members = True
+# BOT_PROFILE=full caches every guild member at startup; BOT_PROFILE=lowmem
+# keeps no member cache and resolves users on demand. Slash commands receive
+# the members they are invoked with, so no command needs the full cache.
+BOT_PROFILE = os.getenv('BOT_PROFILE', 'full')
 
-bot = commands.Bot(command_prefix='!', intents=intents)
-db = DatabaseManager()
+def build_bot_options(profile):
+    """Gateway intents and cache settings for a bot profile"""
+    intents = discord.Intents.default()
+    intents.guilds = True
+    options = {'intents': intents, 'tree_cls': TracedCommandTree}
+    if tracing.enabled():
+        options['http_trace'] = tracing.aiohttp_trace_config()
+    if profile == 'lowmem':
+        intents.voice_states = False
+        options['member_cache_flags'] = discord.MemberCacheFlags.none()
+        options['chunk_guilds_at_startup'] = False
+        return options
+    intents.message_content = True
+    intents.members = True
+    return options
 
-# BombSquad server info
-BOMBSQUAD_IP = "18.228.228.44"
-BOMBSQUAD_PORT = "3827"
+class TracedCommandTree(app_commands.CommandTree):
+    """Command tree that runs each slash command inside a sampled trace"""
+    
+    async def _call(self, interaction):
+        name = (interaction.data or {}).get('name', 'unknown')
+        with tracing.start_trace(f"command /{name}", user_id=interaction.user.id,
+                                 guild_id=interaction.guild_id):
+            await super()._call(interaction)
+
+bot = commands.Bot(command_prefix='!', **build_bot_options(BOT_PROFILE))
+# Bot-wide settings live in the default database; tournament commands use
+# the database of the guild they were invoked in (see tenant_db)
+db = DatabaseManager.for_tenant(None)
+languages = LanguagePreferences(db)
+maintenance_schedulers = {}
 
 # Admin user IDs (you can modify this list)
 ADMIN_USERS = []  # Add Discord user IDs here
 
+async def resolve_user(user_id):
+    """Get a user from the cache, fetching it from the API when not cached"""
+    user_id = int(user_id)
+    user = bot.get_user(user_id)
+    if user is None:
+        try:
+            user = await bot.fetch_user(user_id)
+        except discord.NotFound:
+            return None
+    return user
+
+async def tenant_db(interaction):
+    """The tournament database of the guild an interaction came from"""
+    # Opening a guild's shard for the first time creates its schema
+    return await asyncio.to_thread(DatabaseManager.for_tenant, interaction.guild_id)
+
+async def user_language(interaction):
+    """The language to answer an interaction's user in"""
+    return await asyncio.to_thread(languages.get, interaction.user.id, interaction.locale)
+
+def localized_embed(name, language, **values):
+    """Embed from a pre-resolved translation template (see translations.EMBED_TEMPLATES)"""
+    return discord.Embed.from_dict(render_embed(name, language, **values))
+
+@tracing.traced()
 def is_admin(interaction):
     """Check if user is an admin"""
     return interaction.user.id in ADMIN_USERS or interaction.user.guild_permissions.administrator
 
+def command_tree_hash():
+    """Stable hash of the slash command definitions as sent to Discord"""
+    payload = sorted((command.to_dict(bot.tree) for command in bot.tree.get_commands()),
+                     key=lambda command: command['name'])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+async def sync_commands(force=False):
+    """Sync slash commands only when their definitions changed since the last sync"""
+    tree_hash = command_tree_hash()
+    if not force and await asyncio.to_thread(db.get_setting, 'command_tree_hash') == tree_hash:
+        saved = float(await asyncio.to_thread(db.get_setting, 'command_sync_seconds', 0))
+        logger.info(f"⚡ Command tree unchanged, skipped sync (saved ~{saved:.2f}s)")
+        return None
+    
+    start = time.perf_counter()
+    synced = await bot.tree.sync()
+    elapsed = time.perf_counter() - start
+    await asyncio.to_thread(db.set_setting, 'command_tree_hash', tree_hash)
+    await asyncio.to_thread(db.set_setting, 'command_sync_seconds', f"{elapsed:.3f}")
+    logger.info(f"⚡ Synced {len(synced)} slash commands in {elapsed:.2f}s")
+    return synced
+
 @bot.event
 async def on_ready():
     logger.info(f'✅ {bot.user} has connected to Discord!')
-    logger.info(f'🤖 Bot ID: {bot.user.id}')
+    logger.info(f'🤖 Bot ID: {bot.user.id} (profile: {BOT_PROFILE})')
     try:
-        synced = await bot.tree.sync()
-        logger.info(f"⚡ Synced {len(synced)} slash commands")
+        await sync_commands(force=os.getenv('FORCE_COMMAND_SYNC') == '1')
+        
+        if not outbox_worker.is_running():
+            outbox_worker.start()
+            logger.info("📬 Notification outbox worker started")
         
-        if not reminder_check.is_running():
-            reminder_check.start()
-            logger.info("⏰ Reminder task started")
+        if not rollup_job.is_running():
+            rollup_job.start()
+            logger.info("📈 Daily rollup task started")
+        
+        if not maintenance_job.is_running():
+            maintenance_job.start()
+            logger.info("💾 Backup and maintenance task started")
             
         logger.info("🎉 Bot is fully ready!")
     except Exception as e:
         logger.error(f"❌ Error in on_ready: {e}")
 
+@bot.tree.command(name="sync", description="Force a slash command sync with Discord (Admin only)")
+async def sync_command(interaction: discord.Interaction):
+    """Force a slash command sync regardless of the stored tree hash"""
+    if not is_admin(interaction):
+        embed = discord.Embed(
+            title="❌ Access Denied",
+            description="Only administrators can sync commands.",
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True)
+    try:
+        synced = await sync_commands(force=True)
+        embed = discord.Embed(
+            title="⚡ Commands Synced",
+            description=f"Synced **{len(synced)}** slash commands with Discord.",
+            color=0x00ff00
+        )
+    except Exception as e:
+        logger.error(f"Error syncing commands: {e}")
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while syncing commands.",
+            color=0xff0000
+        )
+    
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
 @bot.tree.command(name="ip", description="Display BombSquad server IP and port")
 async def ip_command(interaction: discord.Interaction):
     """Display server IP and port"""
-    embed = discord.Embed(
-        title="🎮 BombSquad Server Information",
-        description="Connect to our official tournament server!",
-        color=0x00ff00
-    )
-    embed.add_field(name="🌐 IP Address", value=f"`{BOMBSQUAD_IP}`", inline=True)
-    embed.add_field(name="🔌 Port", value=f"`{BOMBSQUAD_PORT}`", inline=True)
-    embed.add_field(name="📋 Full Address", value=f"`{BOMBSQUAD_IP}:{BOMBSQUAD_PORT}`", inline=False)
-    embed.set_footer(text="Duel Lords Tournament • Copy and paste into BombSquad")
+    server_ip, server_port = await asyncio.to_thread((await tenant_db(interaction)).get_server_address)
+    embed = localized_embed('server_info', await user_language(interaction), ip=server_ip, port=server_port)
     embed.timestamp = datetime.utcnow()
     
     await interaction.response.send_message(embed=embed)
 
-@bot.tree.command(name="register", description="Register a new player (Admin only)")
-async def register_player(interaction: discord.Interaction, player: discord.Member, player_name: str):
-    """Register a new player"""
+@bot.tree.command(name="set_server", description="Set this server's BombSquad IP and port (Admin only)")
+async def set_server(interaction: discord.Interaction, ip: str, port: app_commands.Range[int, 1, 65535]):
+    """Set the game server address announced for this guild's tournament"""
     if not is_admin(interaction):
         embed = discord.Embed(
             title="❌ Access Denied",
-            description="Only administrators can register players.",
+            description="Only administrators can change the server address.",
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+
+    if await asyncio.to_thread((await tenant_db(interaction)).set_server_address, ip.strip(), port):
+        embed = discord.Embed(
+            title="✅ Server Updated",
+            description=f"Tournament server set to `{ip.strip()}:{port}`.",
+            color=0x00ff00
+        )
+        embed.set_footer(text="Duel Lords Tournament")
+        embed.timestamp = datetime.utcnow()
+    else:
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while saving the server address.",
             color=0xff0000
         )
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="language", description="Choose the language the bot replies to you in")
+@app_commands.choices(language=[app_commands.Choice(name=t['language'], value=code) for code, t in CATALOGS.items()])
+async def set_language(interaction: discord.Interaction, language: app_commands.Choice[str]):
+    """Store the user's language for future replies and DMs"""
+    if await asyncio.to_thread(languages.set, interaction.user.id, language.value):
+        embed = localized_embed('language_updated', language.value, language_name=language.name)
+    else:
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while saving your language.",
+            color=0xff0000
+        )
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="register", description="Register a new player (Admin only)")
+async def register_player(interaction: discord.Interaction, player: discord.Member, player_name: str):
+    """Register a new player"""
+    db = await tenant_db(interaction)
+    language = await user_language(interaction)
+    if not is_admin(interaction):
+        embed = localized_embed('access_denied', language)
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
     
     try:
-        success = db.add_player(player.id, player_name, player.display_name)
+        success = await asyncio.to_thread(db.add_player, player.id, player_name, player.display_name)
         if success:
-            embed = discord.Embed(
-                title="✅ Player Registered Successfully",
-                description=f"Player **{player_name}** has been registered for the tournament!",
-                color=0x00ff00
-            )
-            embed.add_field(name="Discord User", value=player.mention, inline=True)
-            embed.add_field(name="Player Name", value=player_name, inline=True)
+            embed = localized_embed('player_registered', language, player_name=player_name, mention=player.mention)
             embed.set_thumbnail(url=player.avatar.url if player.avatar else None)
-            embed.set_footer(text="Duel Lords Tournament")
             embed.timestamp = datetime.utcnow()
         else:
-            embed = discord.Embed(
-                title="⚠️ Registration Failed",
-                description="Player is already registered or an error occurred.",
-                color=0xffa500
-            )
+            embed = localized_embed('registration_failed', language)
     except Exception as e:
         logger.error(f"Error registering player: {e}")
         embed = discord.Embed(
@@ -104,9 +245,86 @@ async def register_player(interaction: discord.Interaction, player: discord.Memb
     
     await interaction.response.send_message(embed=embed)
 
+# Largest roster file /register_bulk will read
+MAX_ROSTER_BYTES = 1024 * 1024
+
+@bot.tree.command(name="register_bulk", description="Register everyone with a role or listed in a CSV file (Admin only)")
+async def register_bulk(interaction: discord.Interaction, role: discord.Role = None, roster: discord.Attachment = None):
+    """Register many players at once from a role's members or a discord_id,player_name CSV"""
+    db = await tenant_db(interaction)
+    if not is_admin(interaction):
+        embed = discord.Embed(
+            title="❌ Access Denied",
+            description="Only administrators can register players.",
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    if role is None and roster is None:
+        embed = discord.Embed(
+            title="⚠️ Nothing to Register",
+            description="Pass a `role`, a `roster` CSV file (`discord_id,player_name[,discord_name]`), or both.",
+            color=0xffa500
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    # Role membership needs the members intent, which the lowmem profile leaves off
+    if role is not None and not bot.intents.members:
+        embed = discord.Embed(
+            title="⚠️ Role Lookup Unavailable",
+            description=f"Role members cannot be listed with BOT_PROFILE={BOT_PROFILE}. Upload a roster CSV instead.",
+            color=0xffa500
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    await interaction.response.defer()
+    try:
+        players, invalid = [], []
+        if role is not None:
+            if not interaction.guild.chunked:
+                await interaction.guild.chunk()
+            players += [(member.id, member.display_name, member.display_name)
+                        for member in role.members if not member.bot]
+        if roster is not None:
+            if roster.size > MAX_ROSTER_BYTES:
+                raise ValueError(f"roster file is larger than {MAX_ROSTER_BYTES // 1024} KB")
+            parsed, invalid = parse_player_csv((await roster.read()).decode('utf-8-sig'))
+            players += parsed
+        
+        counts = await asyncio.to_thread(db.add_players, players)
+        if counts is None:
+            raise RuntimeError("bulk insert failed")
+        
+        embed = discord.Embed(
+            title="✅ Bulk Registration Complete",
+            description=f"Processed **{len(players)}** players.",
+            color=0x00ff00
+        )
+        embed.add_field(name="➕ Added", value=f"`{counts['added']}`", inline=True)
+        embed.add_field(name="⏭️ Already Registered", value=f"`{counts['skipped']}`", inline=True)
+        if invalid:
+            lines = ', '.join(str(line) for line in invalid[:20])
+            embed.add_field(name="⚠️ Invalid CSV Lines", value=lines + (" ..." if len(invalid) > 20 else ""), inline=False)
+        embed.set_footer(text="Duel Lords Tournament")
+        embed.timestamp = datetime.utcnow()
+        
+    except Exception as e:
+        logger.error(f"Error bulk registering players: {e}")
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while registering players.",
+            color=0xff0000
+        )
+    
+    await interaction.followup.send(embed=embed)
+
 @bot.tree.command(name="remove_player", description="Remove a player from tournament (Admin only)")
 async def remove_player(interaction: discord.Interaction, player: discord.Member):
     """Remove a player from the tournament"""
+    db = await tenant_db(interaction)
     if not is_admin(interaction):
         embed = discord.Embed(
             title="❌ Access Denied",
@@ -117,7 +335,7 @@ async def remove_player(interaction: discord.Interaction, player: discord.Member
         return
     
     try:
-        success = db.remove_player(player.id)
+        success = await asyncio.to_thread(db.remove_player, player.id)
         if success:
             embed = discord.Embed(
                 title="✅ Player Removed",
@@ -143,47 +361,20 @@ async def remove_player(interaction: discord.Interaction, player: discord.Member
 @bot.tree.command(name="stats", description="View player statistics")
 async def player_stats(interaction: discord.Interaction, player: discord.Member = None):
     """Display player statistics"""
+    db = await tenant_db(interaction)
+    language = await user_language(interaction)
     target_player = player if player is not None else interaction.user
     
     try:
-        stats = db.get_player_stats(target_player.id)
+        stats = await asyncio.to_thread(db.get_player_stats, target_player.id)
         if not stats:
-            embed = discord.Embed(
-                title="❌ Player Not Found",
-                description=f"{target_player.mention} is not registered in the tournament.",
-                color=0xff0000
-            )
+            embed = localized_embed('player_not_found', language, mention=target_player.mention)
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Calculate additional stats
-        total_matches = stats['wins'] + stats['losses'] + stats['draws']
-        win_rate = (stats['wins'] / total_matches * 100) if total_matches > 0 else 0
-        kd_ratio = (stats['kills'] / stats['deaths']) if stats['deaths'] > 0 else stats['kills']
-        
-        embed = discord.Embed(
-            title=f"📊 Tournament Statistics",
-            description=f"Statistics for **{stats['player_name']}**",
-            color=0x0099ff
-        )
-        
-        # Basic stats
-        embed.add_field(name="🏆 Wins", value=f"`{stats['wins']}`", inline=True)
-        embed.add_field(name="💔 Losses", value=f"`{stats['losses']}`", inline=True)
-        embed.add_field(name="🤝 Draws", value=f"`{stats['draws']}`", inline=True)
-        
-        # Combat stats
-        embed.add_field(name="⚔️ Kills", value=f"`{stats['kills']}`", inline=True)
-        embed.add_field(name="💀 Deaths", value=f"`{stats['deaths']}`", inline=True)
-        embed.add_field(name="📈 K/D Ratio", value=f"`{kd_ratio:.2f}`", inline=True)
-        
-        # Advanced stats
-        embed.add_field(name="🎯 Total Matches", value=f"`{total_matches}`", inline=True)
-        embed.add_field(name="📊 Win Rate", value=f"`{win_rate:.1f}%`", inline=True)
-        embed.add_field(name="🏅 Points", value=f"`{stats['points']}`", inline=True)
-        
+        # Wins, losses, draws; kills, deaths, K/D; matches, win rate, points
+        embed = localized_embed('player_stats', language, **stats)
         embed.set_thumbnail(url=target_player.avatar.url if target_player.avatar else None)
-        embed.set_footer(text="Duel Lords Tournament • /leaderboard for rankings")
         embed.timestamp = datetime.utcnow()
         
     except Exception as e:
@@ -201,6 +392,7 @@ async def update_stats(interaction: discord.Interaction, player1: discord.Member
                       result: str, player1_kills: int = 0, player1_deaths: int = 0, 
                       player2_kills: int = 0, player2_deaths: int = 0):
     """Update player statistics after a match"""
+    db = await tenant_db(interaction)
     if not is_admin(interaction):
         embed = discord.Embed(
             title="❌ Access Denied",
@@ -210,8 +402,7 @@ async def update_stats(interaction: discord.Interaction, player1: discord.Member
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
     
-    valid_results = ["player1_win", "player2_win", "draw"]
-    if result not in valid_results:
+    if result not in MATCH_RESULTS:
         embed = discord.Embed(
             title="❌ Invalid Result",
             description="Result must be: `player1_win`, `player2_win`, or `draw`",
@@ -221,92 +412,170 @@ async def update_stats(interaction: discord.Interaction, player1: discord.Member
         return
     
     try:
-        success = db.update_match_result(player1.id, player2.id, result, 
-                                       player1_kills, player1_deaths, 
-                                       player2_kills, player2_deaths)
-        
-        if success:
-            # Determine winner for embed
-            if result == "player1_win":
-                winner = player1.mention
-                loser = player2.mention
-            elif result == "player2_win":
-                winner = player2.mention
-                loser = player1.mention
+        match_id = await asyncio.to_thread(db.update_match_result, player1.id, player2.id, result,
+                                           player1_kills, player1_deaths,
+                                           player2_kills, player2_deaths)
+        
+        language = await user_language(interaction)
+        if match_id:
+            combat = (f"{player1.mention}: {player1_kills}K/{player1_deaths}D\n"
+                      f"{player2.mention}: {player2_kills}K/{player2_deaths}D")
+            if result == "draw":
+                embed = localized_embed('match_drawn', language, combat=combat, match_id=match_id)
             else:
-                winner = "Draw"
-                loser = ""
-            
+                winner, loser = (player1, player2) if result == "player1_win" else (player2, player1)
+                embed = localized_embed('match_result_updated', language, winner=winner.mention,
+                                        loser=loser.mention, combat=combat, match_id=match_id)
+            embed.timestamp = datetime.utcnow()
+        else:
+            embed = localized_embed('update_failed', language)
+    except Exception as e:
+        logger.error(f"Error updating stats: {e}")
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while updating statistics.",
+            color=0xff0000
+        )
+    
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="void_match", description="Void a recorded match and reverse its stats (Admin only)")
+async def void_match(interaction: discord.Interaction, match_id: int):
+    """Void a recorded match"""
+    db = await tenant_db(interaction)
+    if not is_admin(interaction):
+        embed = discord.Embed(
+            title="❌ Access Denied",
+            description="Only administrators can void matches.",
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    try:
+        match = await asyncio.to_thread(db.void_match, match_id)
+        if match:
             embed = discord.Embed(
-                title="✅ Match Result Updated",
-                description="Statistics have been successfully updated!",
+                title="🗑️ Match Voided",
+                description=f"Match `#{match_id}` has been voided and its statistics reversed.",
                 color=0x00ff00
             )
-            
-            if result != "draw":
-                embed.add_field(name="🏆 Winner", value=winner, inline=True)
-                embed.add_field(name="💔 Defeated", value=loser, inline=True)
-            else:
-                embed.add_field(name="🤝 Result", value="Draw", inline=True)
-            
-            embed.add_field(name="⚔️ Combat Stats", 
-                          value=f"{player1.mention}: {player1_kills}K/{player1_deaths}D\n{player2.mention}: {player2_kills}K/{player2_deaths}D", 
+            embed.add_field(name="🥊 Fighters", value=f"<@{match['player1_id']}> ⚔️ <@{match['player2_id']}>", inline=False)
+            embed.set_footer(text="Duel Lords Tournament")
+            embed.timestamp = datetime.utcnow()
+        else:
+            embed = discord.Embed(
+                title="⚠️ Match Not Found",
+                description=f"No recorded match with ID `#{match_id}`.",
+                color=0xffa500
+            )
+    except Exception as e:
+        logger.error(f"Error voiding match: {e}")
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while voiding the match.",
+            color=0xff0000
+        )
+    
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="correct_match", description="Correct a recorded match result (Admin only)")
+async def correct_match(interaction: discord.Interaction, match_id: int, result: str,
+                        player1_kills: Optional[int] = None, player1_deaths: Optional[int] = None,
+                        player2_kills: Optional[int] = None, player2_deaths: Optional[int] = None):
+    """Replace a recorded match result; kills and deaths left out keep their recorded values"""
+    db = await tenant_db(interaction)
+    if not is_admin(interaction):
+        embed = discord.Embed(
+            title="❌ Access Denied",
+            description="Only administrators can correct matches.",
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    if result not in MATCH_RESULTS:
+        embed = discord.Embed(
+            title="❌ Invalid Result",
+            description="Result must be: `player1_win`, `player2_win`, or `draw`",
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    try:
+        match = await asyncio.to_thread(db.correct_match, match_id, result,
+                                        player1_kills, player1_deaths, player2_kills, player2_deaths)
+        if match:
+            embed = discord.Embed(
+                title="✏️ Match Corrected",
+                description=f"Match `#{match_id}` now reads **{result.replace('_', ' ')}**.",
+                color=0x00ff00
+            )
+            embed.add_field(name="⚔️ Combat Stats",
+                          value=f"<@{match['player1_id']}>: {match['player1_kills']}K/{match['player1_deaths']}D\n<@{match['player2_id']}>: {match['player2_kills']}K/{match['player2_deaths']}D",
                           inline=False)
-            
             embed.set_footer(text="Duel Lords Tournament")
             embed.timestamp = datetime.utcnow()
         else:
             embed = discord.Embed(
-                title="❌ Update Failed",
-                description="One or both players are not registered.",
-                color=0xff0000
+                title="⚠️ Match Not Found",
+                description=f"No recorded match with ID `#{match_id}`.",
+                color=0xffa500
             )
     except Exception as e:
-        logger.error(f"Error updating stats: {e}")
+        logger.error(f"Error correcting match: {e}")
         embed = discord.Embed(
             title="❌ Error",
-            description="An error occurred while updating statistics.",
+            description="An error occurred while correcting the match.",
             color=0xff0000
         )
     
     await interaction.response.send_message(embed=embed)
 
+# Player fields the leaderboard embed shows
+LEADERBOARD_EMBED_COLUMNS = ('player_name', 'points', 'wins', 'losses', 'draws', 'win_rate', 'kd_ratio')
+
 @bot.tree.command(name="leaderboard", description="View tournament leaderboard")
-async def leaderboard(interaction: discord.Interaction):
+async def leaderboard(interaction: discord.Interaction, sort: str = "points", min_matches: int = 0):
     """Display tournament leaderboard"""
+    db = await tenant_db(interaction)
+    if sort not in LEADERBOARD_SORTS:
+        embed = discord.Embed(
+            title="❌ Invalid Sort",
+            description="Sort must be: " + ", ".join(f"`{name}`" for name in LEADERBOARD_SORTS),
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
     try:
-        players = db.get_leaderboard()
+        if sort == "points" and min_matches <= 0:
+            players = (await asyncio.to_thread(get_snapshot_store(db).current)).top_players(10)
+        else:
+            players = await asyncio.to_thread(db.get_leaderboard, 10, sort, min_matches, LEADERBOARD_EMBED_COLUMNS)
         
+        language = await user_language(interaction)
+        t = catalog(language)
         if not players:
-            embed = discord.Embed(
-                title="📊 Tournament Leaderboard",
-                description="No players registered yet!",
-                color=0xffa500
-            )
+            message = t['no_players'] if min_matches <= 0 else t['no_players_min'].format(min_matches=min_matches)
+            embed = localized_embed('leaderboard_empty', language, message=message)
             await interaction.response.send_message(embed=embed)
             return
         
-        embed = discord.Embed(
-            title="🏆 Tournament Leaderboard",
-            description="Top performers in the Duel Lords tournament",
-            color=0xffd700
-        )
-        
         # Top 10 players
         leaderboard_text = ""
         for i, player in enumerate(players[:10], 1):
-            total_matches = player['wins'] + player['losses'] + player['draws']
-            win_rate = (player['wins'] / total_matches * 100) if total_matches > 0 else 0
-            kd_ratio = (player['kills'] / player['deaths']) if player['deaths'] > 0 else player['kills']
+            win_rate = player['win_rate']
+            kd_ratio = player['kd_ratio']
             
             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`{i}.`"
             
             leaderboard_text += f"{medal} **{player['player_name']}**\n"
-            leaderboard_text += f"   Points: `{player['points']}` | W/L/D: `{player['wins']}/{player['losses']}/{player['draws']}`\n"
-            leaderboard_text += f"   K/D: `{kd_ratio:.2f}` | Win Rate: `{win_rate:.1f}%`\n\n"
+            leaderboard_text += f"   {t['points']}: `{player['points']}` | {t['wld']}: `{player['wins']}/{player['losses']}/{player['draws']}`\n"
+            leaderboard_text += f"   {t['kd']}: `{kd_ratio:.2f}` | {t['win_rate']}: `{win_rate:.1f}%`\n\n"
         
-        embed.description = leaderboard_text
-        embed.set_footer(text="Duel Lords Tournament • Visit our website for full rankings")
+        embed = localized_embed('leaderboard', language, standings=leaderboard_text, sort=sort)
         embed.timestamp = datetime.utcnow()
         
     except Exception as e:
@@ -319,41 +588,257 @@ async def leaderboard(interaction: discord.Interaction):
     
     await interaction.response.send_message(embed=embed)
 
+@bot.tree.command(name="new_season", description="Close the current season and start a new one (Admin only)")
+async def new_season(interaction: discord.Interaction, name: str):
+    """Start a new season; previous seasons stay on record"""
+    db = await tenant_db(interaction)
+    if not is_admin(interaction):
+        embed = discord.Embed(
+            title="❌ Access Denied",
+            description="Only administrators can start a new season.",
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    try:
+        season_id = await asyncio.to_thread(db.start_season, name)
+        if season_id:
+            embed = discord.Embed(
+                title="🏁 New Season Started",
+                description=f"**{name}** is now live. All-time standings are kept; this season's results are ranked separately.",
+                color=0x00ff00
+            )
+            embed.add_field(name="Season", value=f"`#{season_id}`", inline=True)
+            embed.set_footer(text="Duel Lords Tournament • /season_leaderboard for season standings")
+            embed.timestamp = datetime.utcnow()
+        else:
+            embed = discord.Embed(
+                title="❌ Error",
+                description="Could not start a new season.",
+                color=0xff0000
+            )
+    except Exception as e:
+        logger.error(f"Error starting season: {e}")
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while starting the season.",
+            color=0xff0000
+        )
+    
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="season_leaderboard", description="View the leaderboard of the current or a past season")
+async def season_leaderboard(interaction: discord.Interaction, season: int = None):
+    """Display a season leaderboard"""
+    db = await tenant_db(interaction)
+    try:
+        seasons = await asyncio.to_thread(db.get_seasons)
+        if season is None:
+            target = await asyncio.to_thread(db.get_active_season)
+        else:
+            target = next((s for s in seasons if s['id'] == season), None)
+        
+        if not target:
+            embed = discord.Embed(
+                title="❌ Season Not Found",
+                description="Available seasons: " + (", ".join(f"`{s['id']}`" for s in seasons) or "none"),
+                color=0xff0000
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        players = await asyncio.to_thread(db.get_season_leaderboard, target['id'], 10)
+        embed = discord.Embed(
+            title=f"🏆 {target['name']} Leaderboard",
+            description="No matches played this season yet!",
+            color=0xffd700
+        )
+        
+        if players:
+            leaderboard_text = ""
+            for i, player in enumerate(players, 1):
+                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`{i}.`"
+                leaderboard_text += f"{medal} **{player['player_name']}**\n"
+                leaderboard_text += f"   Points: `{player['points']}` | W/L/D: `{player['wins']}/{player['losses']}/{player['draws']}`\n\n"
+            embed.description = leaderboard_text
+        
+        status = f"Ended {target['ended_at']}" if target['ended_at'] else "In progress"
+        embed.set_footer(text=f"Duel Lords Tournament • Season #{target['id']} • {status}")
+        embed.timestamp = datetime.utcnow()
+        
+    except Exception as e:
+        logger.error(f"Error getting season leaderboard: {e}")
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while retrieving the season leaderboard.",
+            color=0xff0000
+        )
+    
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="reconcile", description="Check player stats against match history (Admin only)")
+async def reconcile(interaction: discord.Interaction, repair: bool = False):
+    """Report, and optionally repair, drift between player counters and matches"""
+    db = await tenant_db(interaction)
+    if not is_admin(interaction):
+        embed = discord.Embed(
+            title="❌ Access Denied",
+            description="Only administrators can reconcile statistics.",
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True)
+    discrepancies = await asyncio.to_thread(db.reconcile_stats, repair)
+    
+    if discrepancies is None:
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while reconciling statistics.",
+            color=0xff0000
+        )
+    elif not discrepancies:
+        embed = discord.Embed(
+            title="✅ Stats Consistent",
+            description="Every player's stats match their match history.",
+            color=0x00ff00
+        )
+    else:
+        lines = []
+        for d in discrepancies[:10]:
+            changes = ", ".join(f"{column} {d['stored'][column]}→{d['expected'][column]}"
+                                for column in STAT_COLUMNS if d['stored'][column] != d['expected'][column])
+            season = f" (season #{d['season_id']})" if 'season_id' in d else ""
+            lines.append(f"**{d['player_name']}**{season}: {changes}")
+        if len(discrepancies) > 10:
+            lines.append(f"...and {len(discrepancies) - 10} more")
+        embed = discord.Embed(
+            title="🛠️ Stats Repaired" if repair else "⚠️ Stat Drift Found",
+            description="\n".join(lines),
+            color=0x00ff00 if repair else 0xffa500
+        )
+        if not repair:
+            embed.set_footer(text="Run /reconcile repair:True to fix these")
+    
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
 @bot.tree.command(name="players", description="List all registered players")
 async def list_players(interaction: discord.Interaction):
     """List all registered players"""
+    db = await tenant_db(interaction)
+    language = await user_language(interaction)
     try:
-        players = db.get_all_players()
+        players = await asyncio.to_thread(db.get_all_players, columns=('player_name', 'total_matches'))
+        
+        if not players:
+            embed = localized_embed('players_empty', language)
+            await interaction.response.send_message(embed=embed)
+            return
+        
+        matches = catalog(language)['matches']
+        player_list = ""
+        for i, player in enumerate(players, 1):
+            total_matches = player['total_matches']
+            player_list += f"`{i}.` **{player['player_name']}** - {total_matches} {matches}\n"
+        
+        embed = localized_embed('players', language, count=len(players), player_list=player_list)
+        embed.timestamp = datetime.utcnow()
+        
+    except Exception as e:
+        logger.error(f"Error listing players: {e}")
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while retrieving players.",
+            color=0xff0000
+        )
+    
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="find", description="Search registered players by name")
+async def find_player(interaction: discord.Interaction, query: str):
+    """Find players by name, tolerating partial names and typos"""
+    db = await tenant_db(interaction)
+    try:
+        players = await asyncio.to_thread(db.search_players, query, 10)
         
         if not players:
             embed = discord.Embed(
-                title="👥 Registered Players",
-                description="No players registered yet!",
+                title="🔍 Player Search",
+                description=f"No players found matching **{query}**.",
                 color=0xffa500
             )
-            await interaction.response.send_message(embed=embed)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
         embed = discord.Embed(
-            title="👥 Registered Players",
-            description=f"Total registered players: **{len(players)}**",
+            title="🔍 Player Search",
+            description=f"Players matching **{query}**",
             color=0x0099ff
         )
         
-        player_list = ""
+        results = ""
         for i, player in enumerate(players, 1):
-            total_matches = player['wins'] + player['losses'] + player['draws']
-            player_list += f"`{i}.` **{player['player_name']}** - {total_matches} matches\n"
+            results += (f"`{i}.` **{player['player_name']}** (<@{player['discord_id']}>) - "
+                        f"{player['points']} pts, {player['total_matches']} matches\n")
         
-        embed.add_field(name="🎮 Players", value=player_list, inline=False)
-        embed.set_footer(text="Duel Lords Tournament")
+        embed.add_field(name="🎮 Results", value=results, inline=False)
+        embed.set_footer(text="Duel Lords Tournament • /stats for full statistics")
         embed.timestamp = datetime.utcnow()
         
     except Exception as e:
-        logger.error(f"Error listing players: {e}")
+        logger.error(f"Error searching players: {e}")
         embed = discord.Embed(
             title="❌ Error",
-            description="An error occurred while retrieving players.",
+            description="An error occurred while searching players.",
+            color=0xff0000
+        )
+    
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="suggest_opponent", description="Suggest evenly matched opponents not faced recently")
+async def suggest_opponent(interaction: discord.Interaction, player: discord.Member = None,
+                           count: app_commands.Range[int, 1, 10] = 5):
+    """Suggest the closest-rated players a player has not met recently"""
+    db = await tenant_db(interaction)
+    target_player = player if player is not None else interaction.user
+    
+    try:
+        index = await asyncio.to_thread(get_snapshot_store(db).matchmaking)
+        suggestions = index.suggest(target_player.id, count)
+        if suggestions is None:
+            embed = discord.Embed(
+                title="❌ Player Not Found",
+                description=f"{target_player.mention} is not registered in the tournament.",
+                color=0xff0000
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        points = index.ratings[str(target_player.id)]
+        embed = discord.Embed(
+            title="🎯 Suggested Opponents",
+            description=f"Closest-rated players {target_player.mention} (`{points}` pts) "
+                        f"has not faced in the last {RECENT_OPPONENT_DAYS} days",
+            color=0x0099ff
+        )
+        for i, opponent in enumerate(suggestions, 1):
+            embed.add_field(
+                name=f"{i}. {opponent['player_name']}",
+                value=f"<@{opponent['discord_id']}> • `{opponent['points']}` pts "
+                      f"({opponent['points'] - points:+d})",
+                inline=False
+            )
+        if not suggestions:
+            embed.add_field(name="No opponents available", value="Everyone has been faced recently.", inline=False)
+        embed.set_footer(text="Duel Lords Tournament • /duel to schedule a match")
+        embed.timestamp = datetime.utcnow()
+    except Exception as e:
+        logger.error(f"Error suggesting opponents: {e}")
+        embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while suggesting opponents.",
             color=0xff0000
         )
     
@@ -363,14 +848,12 @@ async def list_players(interaction: discord.Interaction):
 async def schedule_duel(interaction: discord.Interaction, player1: discord.Member, player2: discord.Member, 
                        day: int, hour: int, minute: int):
     """Schedule a duel with reminder"""
+    db = await tenant_db(interaction)
+    language = await user_language(interaction)
     try:
         # Validate time
         if not (1 <= day <= 31) or not (0 <= hour <= 23) or not (0 <= minute <= 59):
-            embed = discord.Embed(
-                title="❌ Invalid Time",
-                description="Please provide valid day (1-31), hour (0-23), and minute (0-59).",
-                color=0xff0000
-            )
+            embed = localized_embed('invalid_time', language)
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
@@ -386,71 +869,29 @@ async def schedule_duel(interaction: discord.Interaction, player1: discord.Membe
                 match_time = match_time.replace(month=now.month + 1)
         
         # Save the duel to database
-        duel_id = db.schedule_duel(player1.id, player2.id, match_time)
+        duel_id = await asyncio.to_thread(db.schedule_duel, player1.id, player2.id, match_time)
         
         if not duel_id:
-            embed = discord.Embed(
-                title="❌ Scheduling Failed",
-                description="Could not schedule the duel. Please ensure both players are registered.",
-                color=0xff0000
-            )
+            embed = localized_embed('scheduling_failed', language)
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
         # Create timestamp for Discord
         timestamp = int(match_time.timestamp())
+        server_ip, server_port = await asyncio.to_thread(db.get_server_address)
         
-        # Create rich embed
-        embed = discord.Embed(
-            title="⚔️ Duel Scheduled",
-            description="A new tournament match has been scheduled!",
-            color=0xff6b35
-        )
-        
-        embed.add_field(name="🥊 Fighters", 
-                       value=f"**{player1.mention}** ⚔️ **{player2.mention}**", 
-                       inline=False)
-        
-        embed.add_field(name="🕐 Match Time", 
-                       value=f"<t:{timestamp}:F>\n<t:{timestamp}:R>", 
-                       inline=True)
-        
-        embed.add_field(name="🌐 Server", 
-                       value=f"`{BOMBSQUAD_IP}:{BOMBSQUAD_PORT}`", 
-                       inline=True)
-        
-        embed.add_field(name="📱 Reminders", 
-                       value="Both players will receive a DM reminder 5 minutes before the match", 
-                       inline=False)
-        
-        embed.set_footer(text="Duel Lords Tournament • Good luck to both fighters!")
+        # Fighters, match time, server and reminder note
+        embed = localized_embed('duel_scheduled', language, player1=player1.mention, player2=player2.mention,
+                                timestamp=timestamp, ip=server_ip, port=server_port)
         embed.timestamp = datetime.utcnow()
         
-        # Send DMs to both players
-        try:
-            dm_embed = discord.Embed(
-                title="⚔️ Duel Scheduled",
-                description="You have been scheduled for a tournament match!",
-                color=0xff6b35
-            )
-            dm_embed.add_field(name="🥊 Opponent", 
-                             value=player2.mention if player1.id != interaction.user.id else player1.mention, 
-                             inline=True)
-            dm_embed.add_field(name="🕐 Time", 
-                             value=f"<t:{timestamp}:F>", 
-                             inline=True)
-            dm_embed.add_field(name="🌐 Server", 
-                             value=f"`{BOMBSQUAD_IP}:{BOMBSQUAD_PORT}`", 
-                             inline=False)
-            dm_embed.set_footer(text="You'll receive a reminder 5 minutes before the match")
-            
-            await player1.send(embed=dm_embed)
-            await player2.send(embed=dm_embed)
-        except discord.Forbidden:
-            logger.warning("Could not send DM to one or both players")
-        
         await interaction.response.send_message(embed=embed)
         
+        # Deliver the queued "duel scheduled" DMs now rather than on the next worker tick
+        drain = asyncio.create_task(drain_outbox(db))
+        background_tasks.add(drain)
+        drain.add_done_callback(background_tasks.discard)
+        
     except Exception as e:
         logger.error(f"Error scheduling duel: {e}")
         embed = discord.Embed(
@@ -460,46 +901,111 @@ async def schedule_duel(interaction: discord.Interaction, player1: discord.Membe
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-@tasks.loop(minutes=1)
-async def reminder_check():
-    """Check for upcoming duels and send reminders"""
+# Notifications delivered per outbox batch
+NOTIFY_BATCH = 50
+
+# Catch-up after downtime: notifications for a duel are still sent late while
+# the duel started less than this long ago, and expire after that
+MISSED_REMINDER_GRACE = timedelta(minutes=15)
+
+# One drain at a time per tenant database
+outbox_locks = {}
+background_tasks = set()
+
+def notification_embed(notification, server, language):
+    """DM embed for a queued notification, in the recipient's language; server is the tournament's (ip, port)"""
+    timestamp = int(datetime.fromisoformat(notification['scheduled_time']).timestamp())
+    template = 'duel_scheduled_dm' if notification['kind'] == 'duel_scheduled' else 'match_reminder_dm'
+    return localized_embed(template, language, opponent=f"<@{notification['payload']['opponent_id']}>",
+                           timestamp=timestamp, when=f"<t:{timestamp}:R>", ip=server[0], port=server[1])
+
+async def deliver_notification(notification, server):
+    """Send one notification, returning its (id, outcome, error) for record_deliveries"""
+    notification_id = notification['id']
+    scheduled_time = notification['scheduled_time']
+    if (notification['completed'] or scheduled_time is None
+            or datetime.fromisoformat(scheduled_time) + MISSED_REMINDER_GRACE < datetime.utcnow()):
+        return notification_id, 'expired', None
+    
     try:
-        upcoming_duels = db.get_upcoming_duels()
-        
-        for duel in upcoming_duels:
-            try:
-                player1 = bot.get_user(duel['player1_id'])
-                player2 = bot.get_user(duel['player2_id'])
-                
-                if player1 and player2:
-                    embed = discord.Embed(
-                        title="⏰ Match Reminder",
-                        description="Your tournament match is starting in 5 minutes!",
-                        color=0xff9500
-                    )
-                    embed.add_field(name="🥊 Opponent", value="Your scheduled opponent", inline=True)
-                    embed.add_field(name="🌐 Server", value=f"`{BOMBSQUAD_IP}:{BOMBSQUAD_PORT}`", inline=True)
-                    embed.add_field(name="📋 Instructions", 
-                                  value="Please join the server and prepare for your match!", 
-                                  inline=False)
-                    embed.set_footer(text="Duel Lords Tournament • Good luck!")
-                    
-                    await player1.send(embed=embed)
-                    await player2.send(embed=embed)
-                
-                # Mark reminder as sent
-                db.mark_reminder_sent(duel['id'])
-                
-            except Exception as e:
-                logger.error(f"Error sending reminder for duel {duel['id']}: {e}")
-                
+        user = await resolve_user(notification['recipient_id'])
+        if user is None:
+            return notification_id, 'failed', 'user not found'
+        language = await asyncio.to_thread(languages.get, notification['recipient_id'])
+        await user.send(embed=notification_embed(notification, server, language))
+        return notification_id, 'sent', None
+    except discord.Forbidden as e:
+        # DMs closed; retrying will not help
+        return notification_id, 'failed', str(e)
     except Exception as e:
-        logger.error(f"Error in reminder check: {e}")
+        return notification_id, 'retry', str(e)
+
+async def drain_outbox(db):
+    """Deliver every due notification of one tenant database in batches, returning how many were processed"""
+    async with outbox_locks.setdefault(db.db_path, asyncio.Lock()):
+        processed = 0
+        server = None
+        while True:
+            due = await asyncio.to_thread(db.get_due_notifications, NOTIFY_BATCH)
+            if not due:
+                break
+            if server is None:
+                server = await asyncio.to_thread(db.get_server_address)
+            results = [await deliver_notification(notification, server) for notification in due]
+            if not await asyncio.to_thread(db.record_deliveries, results):
+                break
+            processed += len(due)
+            outcomes = [outcome for _, outcome, _ in results]
+            logger.info(f"📬 Delivered {outcomes.count('sent')}/{len(results)} notifications for {db.db_path} "
+                        f"({outcomes.count('retry')} retrying, {outcomes.count('failed')} failed, "
+                        f"{outcomes.count('expired')} expired)")
+            if len(due) < NOTIFY_BATCH:
+                break
+        return processed
+
+@tasks.loop(seconds=30)
+async def outbox_worker():
+    """Deliver queued duel notifications of every tenant and report outbox depths"""
+    for tenant in await asyncio.to_thread(DatabaseManager.tenants):
+        try:
+            with tracing.start_trace("task outbox_worker", tracing.SPAN_KIND_INTERNAL, tenant=tenant.db_path):
+                await drain_outbox(tenant)
+            depth = await asyncio.to_thread(tenant.get_outbox_depth)
+            if depth and (depth['due'] or depth['failed']):
+                logger.warning(f"📬 Outbox {tenant.db_path}: {depth['pending']} pending, {depth['due']} due, "
+                               f"{depth['failed']} failed")
+        except Exception as e:
+            logger.error(f"Error in outbox worker for {tenant.db_path}: {e}")
 
-@reminder_check.before_loop
-async def before_reminder_check():
+@outbox_worker.before_loop
+async def before_outbox_worker():
     await bot.wait_until_ready()
 
+@tasks.loop(minutes=5)
+async def rollup_job():
+    """Fold new matches into the per-player daily rollup of every tenant"""
+    for tenant in await asyncio.to_thread(DatabaseManager.tenants):
+        try:
+            with tracing.start_trace("task rollup_job", tracing.SPAN_KIND_INTERNAL, tenant=tenant.db_path):
+                processed = await asyncio.to_thread(tenant.rollup_daily_stats)
+            if processed:
+                logger.info(f"📈 Rolled up {processed} new matches for {tenant.db_path}")
+        except Exception as e:
+            logger.error(f"Error in rollup job for {tenant.db_path}: {e}")
+
+@tasks.loop(minutes=10)
+async def maintenance_job():
+    """Back up each tenant database and run ANALYZE/vacuum when they are due"""
+    for tenant in await asyncio.to_thread(DatabaseManager.tenants):
+        try:
+            scheduler = maintenance_schedulers.get(tenant.db_path)
+            if scheduler is None:
+                scheduler = maintenance_schedulers[tenant.db_path] = MaintenanceScheduler(tenant)
+            with tracing.start_trace("task maintenance_job", tracing.SPAN_KIND_INTERNAL, tenant=tenant.db_path):
+                await asyncio.to_thread(scheduler.run_due)
+        except Exception as e:
+            logger.error(f"Error in maintenance job for {tenant.db_path}: {e}")
+
 def run_bot():
     """Run the Discord bot"""
     token = os.getenv('DISCORD_BOT_TOKEN')
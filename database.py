@@ -1,22 +1,523 @@
+import csv
+import io
+import json
+import os
 import sqlite3
 import logging
+import queue
+import contextvars
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import make_dataclass
+from functools import lru_cache
+from itertools import starmap
 from datetime import datetime, timedelta
 from contextlib import contextmanager
 
+import tracing
+
 logger = logging.getLogger(__name__)
 
+# Seconds a connection waits on a locked database before giving up
+BUSY_TIMEOUT = 5.0
+
+# Generated columns added to players, in dependency order
+DERIVED_PLAYER_COLUMNS = {
+    'total_matches': 'wins + losses + draws',
+    'win_rate': 'CASE WHEN wins + losses + draws > 0 THEN wins * 100.0 / (wins + losses + draws) ELSE 0.0 END',
+    'kd_ratio': 'CASE WHEN deaths > 0 THEN kills * 1.0 / deaths ELSE kills * 1.0 END',
+}
+
+# Leaderboard orderings selectable by callers
+LEADERBOARD_SORTS = {
+    'points': 'points DESC, wins DESC, kills DESC',
+    'kd': 'kd_ratio DESC, points DESC',
+    'win_rate': 'win_rate DESC, points DESC',
+    'matches': 'total_matches DESC, points DESC',
+}
+
+# One row per player per match, from each side's point of view.
+# {where} is applied to both halves, so its parameters must be passed twice.
+MATCH_SIDES_SQL = '''
+    SELECT id, match_date, season_id, player1_id AS discord_id, player2_id AS opponent_id,
+           winner_id IS player1_id AS wins,
+           winner_id IS player2_id AS losses,
+           winner_id IS NULL AS draws,
+           player1_kills AS kills, player1_deaths AS deaths,
+           CASE WHEN winner_id IS NULL THEN 1 WHEN winner_id = player1_id THEN 3 ELSE 0 END AS points
+    FROM matches {where}
+    UNION ALL
+    SELECT id, match_date, season_id, player2_id, player1_id,
+           winner_id IS player2_id,
+           winner_id IS player1_id,
+           winner_id IS NULL,
+           player2_kills, player2_deaths,
+           CASE WHEN winner_id IS NULL THEN 1 WHEN winner_id = player2_id THEN 3 ELSE 0 END
+    FROM matches {where}
+'''
+
+MATCH_RESULTS = ("player1_win", "player2_win", "draw")
+
+# Aggregate player columns rebuilt from match history by reconcile_stats
+STAT_COLUMNS = ('wins', 'losses', 'draws', 'kills', 'deaths', 'points')
+
+# Player fields shown by the pages, the snapshot and the leaderboard API
+PLAYER_COLUMNS = ('discord_id', 'player_name', 'wins', 'losses', 'draws', 'kills', 'deaths', 'points',
+                  'total_matches', 'win_rate', 'kd_ratio', 'created_at')
+
+# Match fields shown in match history, with the SQL each is selected as
+MATCH_COLUMN_SQL = {
+    'id': 'm.id',
+    'match_date': 'm.match_date',
+    'season_id': 'm.season_id',
+    'player1_id': 'm.player1_id',
+    'player2_id': 'm.player2_id',
+    'winner_id': 'm.winner_id',
+    'player1_kills': 'm.player1_kills',
+    'player1_deaths': 'm.player1_deaths',
+    'player2_kills': 'm.player2_kills',
+    'player2_deaths': 'm.player2_deaths',
+    'player1_name': 'p1.player_name',
+    'player2_name': 'p2.player_name',
+    'winner_name': 'pw.player_name',
+}
+MATCH_COLUMNS = tuple(MATCH_COLUMN_SQL)
+
+class Row:
+    """Compact read-only result row, readable as ``row.column`` or ``row['column']``.
+
+    Concrete row types are slotted dataclasses made by row_type(), so a row
+    costs one small object per result instead of a dict.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.__slots__
+
+    def _asdict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+@lru_cache(maxsize=None)
+def row_type(columns):
+    """Row class for a tuple of column names, shared by every query projecting them"""
+    return make_dataclass('Row', columns, bases=(Row,), slots=True, eq=False)
+
+def fetch_rows(cursor, columns):
+    """Materialize a cursor's results as row_type(columns) instances"""
+    cursor.row_factory = None
+    return list(starmap(row_type(columns), cursor.fetchall()))
+
+def json_default(value):
+    """``json.dumps`` default that writes rows as objects and anything else as a string"""
+    if isinstance(value, Row):
+        return value._asdict()
+    return str(value)
+
+# Trigram full-text index over player names. The update trigger only fires on
+# name changes, so match results never touch the index.
+PLAYER_SEARCH_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS players_fts_insert AFTER INSERT ON players BEGIN
+        INSERT INTO players_fts (rowid, player_name, discord_name)
+        VALUES (new.id, new.player_name, new.discord_name);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS players_fts_delete AFTER DELETE ON players BEGIN
+        INSERT INTO players_fts (players_fts, rowid, player_name, discord_name)
+        VALUES ('delete', old.id, old.player_name, old.discord_name);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS players_fts_update AFTER UPDATE OF player_name, discord_name ON players BEGIN
+        INSERT INTO players_fts (players_fts, rowid, player_name, discord_name)
+        VALUES ('delete', old.id, old.player_name, old.discord_name);
+        INSERT INTO players_fts (rowid, player_name, discord_name)
+        VALUES (new.id, new.player_name, new.discord_name);
+    END''',
+)
+
+# Reminders are queued to go out this long before a duel starts
+DUEL_REMINDER_LEAD = timedelta(minutes=5)
+
+# Delivery attempts before a notification is marked failed; retries back off
+# exponentially from NOTIFICATION_RETRY_SECONDS up to NOTIFICATION_MAX_BACKOFF
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_SECONDS = 30
+NOTIFICATION_MAX_BACKOFF = 3600
+
+# Delivered and expired notifications are kept this long for inspection
+NOTIFICATION_RETENTION_DAYS = 7
+
+# Opponent suggestions skip players met within this many days
+RECENT_OPPONENT_DAYS = 7
+
+# Fuzzy search matches must share at least this fraction of the query's trigrams
+FUZZY_MIN_OVERLAP = 0.5
+MAX_SEARCH_RESULTS = 25
+
+def name_trigrams(text):
+    """Lowercase character trigrams of a string, ignoring whitespace"""
+    text = ''.join(text.lower().split())
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def parse_player_csv(text):
+    """Parse ``discord_id,player_name[,discord_name]`` lines into player rows.
+
+    A header line is skipped. Returns ``(players, invalid)`` where invalid
+    holds the line numbers that could not be parsed.
+    """
+    players, invalid = [], []
+    for line_number, row in enumerate(csv.reader(io.StringIO(text)), 1):
+        cells = [cell.strip() for cell in row]
+        if not any(cells):
+            continue
+        if len(cells) < 2 or not cells[0].isdigit() or not cells[1]:
+            if line_number > 1:
+                invalid.append(line_number)
+            continue
+        discord_name = cells[2] if len(cells) > 2 and cells[2] else cells[1]
+        players.append((cells[0], cells[1], discord_name))
+    return players, invalid
+
+def fts_phrase(text):
+    """Quote text as a single FTS5 phrase"""
+    return '"' + text.replace('"', '""') + '"'
+
+# How often an idle writer checks for commits made outside this process
+EXTERNAL_CHECK_SECONDS = 1.0
+
+# A writer thread stops after this long without writes or version reads, and
+# starts again on the next one, so idle guild shards hold no thread or connection
+WRITER_IDLE_SECONDS = 60
+
+_external_listeners = []
+
+def add_external_change_listener(callback):
+    """Call ``callback(db_path)`` when another process or connection commits to a database"""
+    _external_listeners.append(callback)
+
+def notify_external_change(db_path):
+    for callback in _external_listeners:
+        try:
+            callback(db_path)
+        except Exception as e:
+            logger.error(f"Error in external change listener: {e}")
+
+class WriteQueue:
+    """Single writer thread that owns the only write connection to a database.
+
+    Mutations are submitted as callables taking a cursor. The writer drains up
+    to ``batch_size`` pending operations at a time and commits them together;
+    each operation runs inside its own savepoint so a failing one does not
+    roll back the rest of the batch.
+
+    Commits from elsewhere (reconcile.py, manual edits, a restored backup)
+    move the connection's PRAGMA data_version. The writer checks it before
+    each batch and every EXTERNAL_CHECK_SECONDS while idle, and treats a
+    change like one of its own commits.
+
+    The thread starts on the first submit() or poll() and stops once neither
+    has happened for WRITER_IDLE_SECONDS. Commits made while it was stopped
+    cannot be seen, so a restarted writer moves the version regardless.
+    """
+
+    def __init__(self, db_path, batch_size=32):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.version = 0
+        # Operations in the batch whose commit listeners are running; empty for external changes
+        self.last_batch = ()
+        self._listeners = []
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+        self._last_used = time.monotonic()
+
+    def submit(self, op, *args):
+        """Queue a write operation and return a Future for its result"""
+        future = Future()
+        # Carry the caller's trace to the writer thread
+        context = contextvars.copy_context() if tracing.current_span() else None
+        with self._lock:
+            self._queue.put((op, args, future, context))
+            self._wake()
+        return future
+
+    def poll(self):
+        """The current version, waking a stopped writer so it resumes checking for external commits"""
+        self._last_used = time.monotonic()
+        if self._thread is None:
+            with self._lock:
+                self._wake()
+        return self.version
+
+    def _wake(self):
+        # Called with _lock held
+        self._last_used = time.monotonic()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"db-writer:{self.db_path}", daemon=True)
+            self._thread.start()
+
+    def add_listener(self, callback):
+        """Call ``callback(version)`` on the writer thread after every commit"""
+        self._listeners.append(callback)
+
+    def close(self):
+        """Stop the writer after pending operations are committed"""
+        with self._lock:
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+    def _stop_if_idle(self):
+        """Let the thread exit if nothing was submitted or polled for WRITER_IDLE_SECONDS"""
+        with self._lock:
+            if not self._queue.empty() or time.monotonic() - self._last_used < WRITER_IDLE_SECONDS:
+                return False
+            self._thread = None
+            self._stopped = True
+            return True
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if tracing.enabled():
+            conn.set_trace_callback(tracing.record_statement)
+        running = True
+        self._external_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if self._stopped:
+            # Another process may have written while no writer was watching
+            notify_external_change(self.db_path)
+            self.version += 1
+        try:
+            while running:
+                try:
+                    batch = [self._queue.get(timeout=EXTERNAL_CHECK_SECONDS)]
+                except queue.Empty:
+                    batch = []
+                self._check_external(conn)
+                if not batch:
+                    if self._stop_if_idle():
+                        break
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    running = False
+                    batch = [item for item in batch if item is not None]
+                if batch:
+                    self._commit_batch(conn, batch)
+        finally:
+            conn.close()
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                    self._stopped = True
+
+    def _check_external(self, conn):
+        """Bump the version if another connection has committed since the last check"""
+        try:
+            external_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error checking for external database changes: {e}")
+            return
+        if external_version == self._external_version:
+            return
+        self._external_version = external_version
+        logger.info(f"Detected a write to {self.db_path} from another connection")
+        notify_external_change(self.db_path)
+        self.version += 1
+        self.last_batch = ()
+        self._notify_listeners()
+
+    def _notify_listeners(self):
+        for callback in self._listeners:
+            try:
+                callback(self.version)
+            except Exception as e:
+                logger.error(f"Error in commit listener: {e}")
+
+    @staticmethod
+    def _traced_op(cursor, op, args, batch_size):
+        with tracing.span(f"db.write {op.__name__}", batch_size=batch_size):
+            return op(cursor, *args)
+    
+    def _commit_batch(self, conn, batch):
+        """Run a batch of operations in one transaction and resolve their futures.
+        
+        A batch that modified no rows does not move the version, so caches
+        keyed on it stay valid and commit listeners are not called.
+        """
+        results = []
+        changes = conn.total_changes
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            for op, args, future, context in batch:
+                cursor.execute('SAVEPOINT op')
+                try:
+                    if context is None:
+                        result = op(cursor, *args)
+                    else:
+                        result = context.run(self._traced_op, cursor, op, args, len(batch))
+                    results.append((future, result, None))
+                    cursor.execute('RELEASE op')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO op')
+                    cursor.execute('RELEASE op')
+                    results.append((future, None, e))
+            cursor.execute('COMMIT')
+            modified = conn.total_changes != changes
+            if modified:
+                self.version += 1
+                self.last_batch = tuple(op for op, _, _, _ in batch)
+        except Exception as e:
+            logger.error(f"Database error in write batch: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        if modified:
+            self._notify_listeners()
+
+_match_listeners = []
+
+def add_match_listener(callback):
+    """Call ``callback(db_path, match)`` after a recorded match is voided or corrected"""
+    _match_listeners.append(callback)
+
+def notify_match_changed(db_path, match):
+    for callback in _match_listeners:
+        try:
+            callback(db_path, match)
+        except Exception as e:
+            logger.error(f"Error in match listener: {e}")
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_write_queue(db_path):
+    """Return the shared writer for a database file, starting it on first use"""
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = WriteQueue(db_path)
+            _writers[db_path] = writer
+        return writer
+
+# TENANCY=guild gives every Discord guild its own database file under
+# TENANT_DIR, with its own writer thread, caches and settings. The default
+# (single) keeps one tournament in DEFAULT_DB_PATH for every guild.
+TENANCY = os.getenv('TENANCY', 'single')
+TENANT_DIR = os.getenv('TENANT_DIR', 'tenants')
+DEFAULT_DB_PATH = "tournament.db"
+# Guild that keeps using DEFAULT_DB_PATH once sharding is enabled, so an
+# existing tournament carries over
+PRIMARY_GUILD_ID = os.getenv('PRIMARY_GUILD_ID')
+
+# Game server address announced until a tenant sets its own
+DEFAULT_SERVER_IP = "18.228.228.44"
+DEFAULT_SERVER_PORT = "3827"
+
+def tenant_db_path(tenant_id):
+    """Database file for a guild id; None means the default tournament"""
+    if TENANCY != 'guild' or tenant_id is None or str(tenant_id) == PRIMARY_GUILD_ID:
+        return DEFAULT_DB_PATH
+    return os.path.join(TENANT_DIR, f"{int(tenant_id)}.db")
+
+_tenants = {}
+_tenants_lock = threading.Lock()
+
 class DatabaseManager:
-    def __init__(self, db_path="tournament.db"):
+    def __init__(self, db_path=DEFAULT_DB_PATH):
         self.db_path = db_path
+        self.search_enabled = False
         self.init_database()
+        self.writer = get_write_queue(db_path)
+    
+    @classmethod
+    def for_tenant(cls, tenant_id, create=True):
+        """Shard router: the shared manager for a guild's database.
+        
+        With create=False a guild without a database yet gets None instead of
+        a new empty shard, so untrusted ids (e.g. from URLs) cannot create files.
+        """
+        path = tenant_db_path(tenant_id)
+        manager = _tenants.get(path)
+        if manager is not None:
+            return manager
+        with _tenants_lock:
+            manager = _tenants.get(path)
+            if manager is None:
+                if not create and not os.path.exists(path):
+                    return None
+                if os.path.dirname(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                manager = _tenants[path] = cls(path)
+                logger.info(f"📂 Opened tournament database {path}")
+            return manager
+    
+    @classmethod
+    def tenant_ids(cls):
+        """Tenants that have a database: None for the default tournament, then each guild shard"""
+        ids = [None]
+        if TENANCY == 'guild' and os.path.isdir(TENANT_DIR):
+            ids += sorted(int(name[:-3]) for name in os.listdir(TENANT_DIR)
+                          if name.endswith('.db') and name[:-3].isdigit() and name[:-3] != PRIMARY_GUILD_ID)
+        return ids
+    
+    @classmethod
+    def tenants(cls):
+        """Managers for every tenant database, opening shards not used yet.
+        
+        An open shard costs no thread until it is written to or its data
+        version is read, and its writer stops again once it goes idle.
+        """
+        return [cls.for_tenant(tenant_id) for tenant_id in cls.tenant_ids()]
+    
+    @property
+    def data_version(self):
+        """Counter bumped after every committed write batch, and when another process writes"""
+        return self.writer.poll()
+    
+    def submit(self, op, *args):
+        """Queue a write operation on the shared writer thread, returning a Future"""
+        return self.writer.submit(op, *args)
+    
+    def _write(self, op, *args):
+        """Run a write operation on the writer thread and wait for its result"""
+        return self.submit(op, *args).result()
     
     @contextmanager
     def get_db_connection(self):
         """Context manager for database connections"""
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
             conn.row_factory = sqlite3.Row
+            if tracing.current_span():
+                conn.set_trace_callback(tracing.record_statement)
             yield conn
         except Exception as e:
             if conn:
@@ -32,6 +533,12 @@ class DatabaseManager:
         with self.get_db_connection() as conn:
             cursor = conn.cursor()
             
+            # Only takes effect on a new database; maintenance converts older ones
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            
+            # WAL lets readers proceed while the writer thread commits
+            cursor.execute('PRAGMA journal_mode=WAL')
+            
             # Players table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS players (
@@ -49,6 +556,21 @@ class DatabaseManager:
                 )
             ''')
             
+            # Derived stats as indexed generated columns, so alternate rankings are index scans
+            cursor.execute('PRAGMA table_xinfo(players)')
+            player_columns = [row['name'] for row in cursor.fetchall()]
+            for column, expression in DERIVED_PLAYER_COLUMNS.items():
+                if column not in player_columns:
+                    cursor.execute(f'ALTER TABLE players ADD COLUMN {column} GENERATED ALWAYS AS ({expression}) VIRTUAL')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_players_points ON players (points DESC, wins DESC, kills DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_players_kd ON players (kd_ratio DESC, points DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_players_win_rate ON players (win_rate DESC, points DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_players_matches ON players (total_matches DESC, points DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_players_name ON players (player_name COLLATE NOCASE)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_players_discord_name ON players (discord_name COLLATE NOCASE)')
+            
+            self.search_enabled = self._init_player_search(cursor)
+            
             # Duels table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS duels (
@@ -77,22 +599,185 @@ class DatabaseManager:
                     match_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_date ON matches (match_date)')
+            
+            # Key/value settings, including the active season pointer
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            
+            # Per-user bot language; users span guilds, so the bot keeps these in the default database
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_languages (
+                    discord_id TEXT PRIMARY KEY,
+                    language TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Seasons table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS seasons (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    ended_at TIMESTAMP
+                )
+            ''')
+            
+            # Per-season player stats, partitioned by season
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS season_stats (
+                    season_id INTEGER NOT NULL,
+                    discord_id TEXT NOT NULL,
+                    wins INTEGER DEFAULT 0,
+                    losses INTEGER DEFAULT 0,
+                    draws INTEGER DEFAULT 0,
+                    kills INTEGER DEFAULT 0,
+                    deaths INTEGER DEFAULT 0,
+                    points INTEGER DEFAULT 0,
+                    PRIMARY KEY (season_id, discord_id)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_season_stats_rank
+                ON season_stats (season_id, points DESC, wins DESC, kills DESC)
+            ''')
+            
+            # Per-player, per-day rollup of matches for progress timelines
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS player_daily (
+                    discord_id TEXT NOT NULL,
+                    day DATE NOT NULL,
+                    points INTEGER DEFAULT 0,
+                    wins INTEGER DEFAULT 0,
+                    losses INTEGER DEFAULT 0,
+                    draws INTEGER DEFAULT 0,
+                    kills INTEGER DEFAULT 0,
+                    deaths INTEGER DEFAULT 0,
+                    matches INTEGER DEFAULT 0,
+                    rank INTEGER,
+                    PRIMARY KEY (discord_id, day)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_player_daily_day ON player_daily (day)')
+            
+            # Audit trail of voided and corrected matches
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS match_corrections (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    match_id INTEGER NOT NULL,
+                    action TEXT NOT NULL,
+                    old_values TEXT NOT NULL,
+                    new_values TEXT,
+                    corrected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Outbox of notifications waiting to be delivered by the bot
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'notifications'")
+            outbox_created = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS notifications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    recipient_id TEXT NOT NULL,
+                    duel_id INTEGER,
+                    payload TEXT,
+                    deliver_at TIMESTAMP NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER DEFAULT 0,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    sent_at TIMESTAMP
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_notifications_due ON notifications (status, deliver_at)')
+            if outbox_created:
+                # Queue reminders for duels scheduled before the outbox existed
+                cursor.execute('''
+                    SELECT id, player1_id, player2_id, scheduled_time FROM duels
+                    WHERE reminder_sent = FALSE AND completed = FALSE
+                ''')
+                for duel in cursor.fetchall():
+                    self._enqueue_duel_reminders(cursor, duel['id'], duel['player1_id'], duel['player2_id'],
+                                                 datetime.fromisoformat(duel['scheduled_time']))
+            
+            cursor.execute('PRAGMA table_info(matches)')
+            if 'season_id' not in [row['name'] for row in cursor.fetchall()]:
+                cursor.execute('ALTER TABLE matches ADD COLUMN season_id INTEGER')
+            
+            # Head-to-head record of every ordered pair of players who have met
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'head_to_head'")
+            head_to_head_created = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS head_to_head (
+                    player_id TEXT NOT NULL,
+                    opponent_id TEXT NOT NULL,
+                    matches INTEGER DEFAULT 0,
+                    wins INTEGER DEFAULT 0,
+                    losses INTEGER DEFAULT 0,
+                    draws INTEGER DEFAULT 0,
+                    kills INTEGER DEFAULT 0,
+                    deaths INTEGER DEFAULT 0,
+                    PRIMARY KEY (player_id, opponent_id)
+                ) WITHOUT ROWID
+            ''')
+            if head_to_head_created:
+                self._rebuild_head_to_head(cursor)
+            
+            # First run: open season 1 holding everything recorded so far
+            cursor.execute("SELECT value FROM settings WHERE key = 'active_season'")
+            if cursor.fetchone() is None:
+                cursor.execute("INSERT INTO seasons (name) VALUES ('Season 1')")
+                season_id = cursor.lastrowid
+                cursor.execute("INSERT INTO settings (key, value) VALUES ('active_season', ?)", (season_id,))
+                cursor.execute('UPDATE matches SET season_id = ? WHERE season_id IS NULL', (season_id,))
+                cursor.execute('''
+                    INSERT INTO season_stats (season_id, discord_id, wins, losses, draws, kills, deaths, points)
+                    SELECT ?, discord_id, wins, losses, draws, kills, deaths, points FROM players
+                ''', (season_id,))
             
             conn.commit()
             logger.info("Database initialized successfully")
     
+    @staticmethod
+    def _init_player_search(cursor):
+        """Create the players_fts index and its triggers, backfilling it on first run"""
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'players_fts'")
+            if cursor.fetchone() is None:
+                cursor.execute('''
+                    CREATE VIRTUAL TABLE players_fts USING fts5(
+                        player_name, discord_name,
+                        content='players', content_rowid='id', tokenize='trigram'
+                    )
+                ''')
+                cursor.execute("INSERT INTO players_fts (players_fts) VALUES ('rebuild')")
+            for trigger in PLAYER_SEARCH_TRIGGERS:
+                cursor.execute(trigger)
+            return True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Full-text player search unavailable, falling back to LIKE: {e}")
+            return False
+    
+    @staticmethod
+    def _add_player(cursor, discord_id, player_name, discord_name):
+        cursor.execute('''
+            INSERT INTO players (discord_id, player_name, discord_name)
+            VALUES (?, ?, ?)
+        ''', (str(discord_id), player_name, discord_name))
+        return True
+    
     def add_player(self, discord_id, player_name, discord_name):
         """Add a new player to the tournament"""
         try:
-            with self.get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO players (discord_id, player_name, discord_name)
-                    VALUES (?, ?, ?)
-                ''', (str(discord_id), player_name, discord_name))
-                conn.commit()
-                logger.info(f"Added player: {player_name} ({discord_id})")
-                return True
+            self._write(self._add_player, discord_id, player_name, discord_name)
+            logger.info(f"Added player: {player_name} ({discord_id})")
+            return True
         except sqlite3.IntegrityError:
             logger.warning(f"Player already exists: {discord_id}")
             return False
@@ -100,17 +785,41 @@ class DatabaseManager:
             logger.error(f"Error adding player: {e}")
             return False
     
+    @staticmethod
+    def _add_players(cursor, players):
+        cursor.executemany('''
+            INSERT OR IGNORE INTO players (discord_id, player_name, discord_name)
+            VALUES (?, ?, ?)
+        ''', [(str(discord_id), player_name, discord_name) for discord_id, player_name, discord_name in players])
+        return cursor.rowcount
+    
+    def add_players(self, players):
+        """Register many (discord_id, player_name, discord_name) rows in one transaction.
+
+        Already registered players are skipped. Returns ``{'added', 'skipped'}``
+        counts, or None on error.
+        """
+        players = list(players)
+        try:
+            added = self._write(self._add_players, players) if players else 0
+            logger.info(f"Bulk registered {added} players ({len(players) - added} skipped)")
+            return {'added': added, 'skipped': len(players) - added}
+        except Exception as e:
+            logger.error(f"Error bulk adding players: {e}")
+            return None
+    
+    @staticmethod
+    def _remove_player(cursor, discord_id):
+        cursor.execute('DELETE FROM players WHERE discord_id = ?', (str(discord_id),))
+        return cursor.rowcount > 0
+    
     def remove_player(self, discord_id):
         """Remove a player from the tournament"""
         try:
-            with self.get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM players WHERE discord_id = ?', (str(discord_id),))
-                if cursor.rowcount > 0:
-                    conn.commit()
-                    logger.info(f"Removed player: {discord_id}")
-                    return True
-                return False
+            removed = self._write(self._remove_player, discord_id)
+            if removed:
+                logger.info(f"Removed player: {discord_id}")
+            return removed
         except Exception as e:
             logger.error(f"Error removing player: {e}")
             return False
@@ -129,172 +838,884 @@ class DatabaseManager:
             logger.error(f"Error getting player stats: {e}")
             return None
     
-    def get_all_players(self):
-        """Get all registered players"""
+    def get_all_players(self, columns=PLAYER_COLUMNS):
+        """Get all registered players as rows holding only the given columns"""
         try:
             with self.get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('SELECT * FROM players ORDER BY created_at')
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                cursor.execute(f'SELECT {", ".join(columns)} FROM players ORDER BY created_at')
+                return fetch_rows(cursor, columns)
         except Exception as e:
             logger.error(f"Error getting all players: {e}")
             return []
     
-    def get_leaderboard(self, limit=20):
-        """Get tournament leaderboard"""
+    def get_recent_pairings(self, days=RECENT_OPPONENT_DAYS):
+        """(player1_id, player2_id) of every match played in the last ``days`` days"""
         try:
             with self.get_db_connection() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = None
                 cursor.execute('''
-                    SELECT * FROM players 
-                    ORDER BY points DESC, wins DESC, kills DESC
+                    SELECT player1_id, player2_id FROM matches
+                    WHERE match_date >= datetime('now', ?)
+                ''', (f'-{days} days',))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error getting recent pairings: {e}")
+            return []
+    
+    def get_head_to_head(self, player_ids):
+        """Head-to-head rows for every ordered pair among ``player_ids`` that has met"""
+        try:
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor()
+                ids = json.dumps([str(discord_id) for discord_id in player_ids])
+                cursor.execute('''
+                    SELECT player_id, opponent_id, matches, wins, losses, draws, kills, deaths,
+                           kills - deaths AS kill_diff
+                    FROM head_to_head
+                    WHERE player_id IN (SELECT value FROM json_each(?))
+                      AND opponent_id IN (SELECT value FROM json_each(?))
+                ''', (ids, ids))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error getting head-to-head records: {e}")
+            return []
+    
+    def get_leaderboard(self, limit=20, sort='points', min_matches=0, columns=PLAYER_COLUMNS):
+        """Get tournament leaderboard, ordered by one of LEADERBOARD_SORTS"""
+        try:
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor()
+                # Unary + keeps the filter off the index so the ORDER BY index drives the scan
+                cursor.execute(f'''
+                    SELECT {", ".join(columns)} FROM players 
+                    WHERE +total_matches >= ?
+                    ORDER BY {LEADERBOARD_SORTS[sort]}
                     LIMIT ?
-                ''', (limit,))
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                ''', (min_matches, limit))
+                return fetch_rows(cursor, columns)
         except Exception as e:
             logger.error(f"Error getting leaderboard: {e}")
             return []
     
-    def update_match_result(self, player1_id, player2_id, result, p1_kills=0, p1_deaths=0, p2_kills=0, p2_deaths=0):
-        """Update player statistics after a match"""
+    def search_players(self, query, limit=10):
+        """Find players by name: prefix matches, then substring matches, then fuzzy matches"""
+        query = query.strip()
+        limit = min(max(limit, 1), MAX_SEARCH_RESULTS)
+        if not query:
+            return []
+        like = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
         try:
             with self.get_db_connection() as conn:
                 cursor = conn.cursor()
+                # Name prefixes, through the NOCASE name indexes
+                cursor.execute(r'''
+                    SELECT * FROM players
+                    WHERE player_name LIKE ? ESCAPE '\' OR discord_name LIKE ? ESCAPE '\'
+                    LIMIT ?
+                ''', (f"{like}%", f"{like}%", limit))
+                results = [dict(row) for row in cursor.fetchall()]
+                found = {player['id'] for player in results}
                 
-                # Check if both players exist
-                cursor.execute('SELECT discord_id FROM players WHERE discord_id IN (?, ?)', 
-                             (str(player1_id), str(player2_id)))
-                if len(cursor.fetchall()) != 2:
-                    return False
-                
-                # Determine winner and points
-                winner_id = None
-                p1_points = 0
-                p2_points = 0
-                
-                if result == "player1_win":
-                    winner_id = str(player1_id)
-                    p1_points = 3
-                    p2_points = 0
-                    # Update player1 wins, player2 losses
-                    cursor.execute('UPDATE players SET wins = wins + 1, points = points + ? WHERE discord_id = ?', 
-                                 (p1_points, str(player1_id)))
-                    cursor.execute('UPDATE players SET losses = losses + 1, points = points + ? WHERE discord_id = ?', 
-                                 (p2_points, str(player2_id)))
-                elif result == "player2_win":
-                    winner_id = str(player2_id)
-                    p1_points = 0
-                    p2_points = 3
-                    # Update player2 wins, player1 losses
-                    cursor.execute('UPDATE players SET wins = wins + 1, points = points + ? WHERE discord_id = ?', 
-                                 (p2_points, str(player2_id)))
-                    cursor.execute('UPDATE players SET losses = losses + 1, points = points + ? WHERE discord_id = ?', 
-                                 (p1_points, str(player1_id)))
-                elif result == "draw":
-                    p1_points = 1
-                    p2_points = 1
-                    # Update both players draws
-                    cursor.execute('UPDATE players SET draws = draws + 1, points = points + ? WHERE discord_id = ?', 
-                                 (p1_points, str(player1_id)))
-                    cursor.execute('UPDATE players SET draws = draws + 1, points = points + ? WHERE discord_id = ?', 
-                                 (p2_points, str(player2_id)))
-                
-                # Update kills and deaths
-                cursor.execute('UPDATE players SET kills = kills + ?, deaths = deaths + ? WHERE discord_id = ?', 
-                             (p1_kills, p1_deaths, str(player1_id)))
-                cursor.execute('UPDATE players SET kills = kills + ?, deaths = deaths + ? WHERE discord_id = ?', 
-                             (p2_kills, p2_deaths, str(player2_id)))
-                
-                # Record the match
-                cursor.execute('''
-                    INSERT INTO matches (player1_id, player2_id, winner_id, player1_kills, player1_deaths, player2_kills, player2_deaths)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (str(player1_id), str(player2_id), winner_id, p1_kills, p1_deaths, p2_kills, p2_deaths))
+                # Then names containing the query anywhere; trigram matching needs three characters
+                if not self.search_enabled or len(query) < 3:
+                    return results
+                if len(results) < limit:
+                    cursor.execute('''
+                        SELECT players.* FROM players_fts
+                        JOIN players ON players.id = players_fts.rowid
+                        WHERE players_fts MATCH ?
+                        LIMIT ?
+                    ''', (fts_phrase(query), limit * 2))
+                    results += [dict(row) for row in cursor.fetchall() if row['id'] not in found][:limit - len(results)]
+                    found = {player['id'] for player in results}
                 
-                conn.commit()
+                # Fill up with names sharing most of the query's trigrams, to tolerate typos
+                trigrams = name_trigrams(query)
+                if len(results) < limit and len(trigrams) > 1:
+                    cursor.execute('''
+                        SELECT players.* FROM players_fts
+                        JOIN players ON players.id = players_fts.rowid
+                        WHERE players_fts MATCH ?
+                        ORDER BY players_fts.rank
+                        LIMIT ?
+                    ''', (' OR '.join(fts_phrase(t) for t in trigrams), limit * 4))
+                    for row in cursor.fetchall():
+                        names = name_trigrams(row['player_name']) | name_trigrams(row['discord_name'])
+                        if row['id'] not in found and len(trigrams & names) >= len(trigrams) * FUZZY_MIN_OVERLAP:
+                            results.append(dict(row))
+                            if len(results) == limit:
+                                break
+                return results
+        except Exception as e:
+            logger.error(f"Error searching players: {e}")
+            return []
+    
+    @staticmethod
+    def _winner_for(result, player1_id, player2_id):
+        """Map a result name to the winner's discord_id (None for a draw)"""
+        return {"player1_win": str(player1_id), "player2_win": str(player2_id), "draw": None}[result]
+    
+    @staticmethod
+    def _apply_match(cursor, match, sign=1):
+        """Add (sign=1) or exactly reverse (sign=-1) a match's effect on player and season stats"""
+        winner_id = match['winner_id']
+        sides = ((match['player1_id'], match['player2_id'], match['player1_kills'], match['player1_deaths']),
+                 (match['player2_id'], match['player1_id'], match['player2_kills'], match['player2_deaths']))
+        for discord_id, opponent_id, kills, deaths in sides:
+            wins, losses, draws = winner_id == discord_id, winner_id == opponent_id, winner_id is None
+            deltas = (sign * wins, sign * losses, sign * draws, sign * kills, sign * deaths, sign * (3 * wins + draws))
+            cursor.execute('''
+                UPDATE players SET wins = wins + ?, losses = losses + ?, draws = draws + ?,
+                                   kills = kills + ?, deaths = deaths + ?, points = points + ?
+                WHERE discord_id = ?
+            ''', deltas + (discord_id,))
+            DatabaseManager._add_season_stats(cursor, match['season_id'], discord_id, *deltas)
+            DatabaseManager._add_head_to_head(cursor, discord_id, opponent_id, sign, *deltas[:5])
+    
+    @staticmethod
+    def _add_head_to_head(cursor, player_id, opponent_id, matches, wins, losses, draws, kills, deaths):
+        cursor.execute('''
+            INSERT INTO head_to_head (player_id, opponent_id, matches, wins, losses, draws, kills, deaths)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (player_id, opponent_id) DO UPDATE SET
+                matches = matches + excluded.matches,
+                wins = wins + excluded.wins,
+                losses = losses + excluded.losses,
+                draws = draws + excluded.draws,
+                kills = kills + excluded.kills,
+                deaths = deaths + excluded.deaths
+        ''', (str(player_id), str(opponent_id), matches, int(wins), int(losses), int(draws), kills, deaths))
+        if matches < 0:
+            # A voided pairing leaves no row behind, as if the players had never met
+            cursor.execute('DELETE FROM head_to_head WHERE player_id = ? AND opponent_id = ? AND matches = 0',
+                           (str(player_id), str(opponent_id)))
+    
+    @staticmethod
+    def _rebuild_head_to_head(cursor):
+        """Recompute every head-to-head row from match history in one grouped pass"""
+        sides = MATCH_SIDES_SQL.format(where='')
+        cursor.execute('DELETE FROM head_to_head')
+        cursor.execute(f'''
+            INSERT INTO head_to_head (player_id, opponent_id, matches, wins, losses, draws, kills, deaths)
+            SELECT discord_id, opponent_id, COUNT(*), SUM(wins), SUM(losses), SUM(draws), SUM(kills), SUM(deaths)
+            FROM ({sides})
+            GROUP BY discord_id, opponent_id
+        ''')
+    
+    @staticmethod
+    def _update_match_result(cursor, player1_id, player2_id, result, p1_kills, p1_deaths, p2_kills, p2_deaths):
+        if result not in MATCH_RESULTS:
+            return False
+        
+        # Check if both players exist
+        cursor.execute('SELECT discord_id FROM players WHERE discord_id IN (?, ?)', 
+                     (str(player1_id), str(player2_id)))
+        if len(cursor.fetchall()) != 2:
+            return False
+        
+        match = {
+            'player1_id': str(player1_id),
+            'player2_id': str(player2_id),
+            'winner_id': DatabaseManager._winner_for(result, player1_id, player2_id),
+            'player1_kills': p1_kills,
+            'player1_deaths': p1_deaths,
+            'player2_kills': p2_kills,
+            'player2_deaths': p2_deaths,
+            'season_id': DatabaseManager._active_season_id(cursor),
+        }
+        DatabaseManager._apply_match(cursor, match)
+        
+        # Record the match
+        cursor.execute('''
+            INSERT INTO matches (player1_id, player2_id, winner_id, player1_kills, player1_deaths, player2_kills, player2_deaths, season_id)
+            VALUES (:player1_id, :player2_id, :winner_id, :player1_kills, :player1_deaths, :player2_kills, :player2_deaths, :season_id)
+        ''', match)
+        return cursor.lastrowid
+    
+    def update_match_result(self, player1_id, player2_id, result, p1_kills=0, p1_deaths=0, p2_kills=0, p2_deaths=0):
+        """Update player statistics after a match; returns the new match id, or False"""
+        try:
+            match_id = self._write(self._update_match_result, player1_id, player2_id, result,
+                                   p1_kills, p1_deaths, p2_kills, p2_deaths)
+            if match_id:
                 logger.info(f"Updated match result: {player1_id} vs {player2_id} - {result}")
-                return True
+            return match_id
                 
         except Exception as e:
             logger.error(f"Error updating match result: {e}")
             return False
     
-    def schedule_duel(self, player1_id, player2_id, scheduled_time):
-        """Schedule a duel between two players"""
+    @staticmethod
+    def _apply_daily(cursor, match, sign):
+        """Adjust the daily rollup for a match it has already folded in"""
+        cursor.execute("SELECT value FROM settings WHERE key = 'rollup_match_id'")
+        row = cursor.fetchone()
+        if row is None or match['id'] > int(row[0]):
+            return
+        sides = MATCH_SIDES_SQL.format(where='WHERE id = ?')
+        cursor.execute(f'''
+            UPDATE player_daily SET
+                points = player_daily.points + ? * s.points,
+                wins = player_daily.wins + ? * s.wins,
+                losses = player_daily.losses + ? * s.losses,
+                draws = player_daily.draws + ? * s.draws,
+                kills = player_daily.kills + ? * s.kills,
+                deaths = player_daily.deaths + ? * s.deaths,
+                matches = player_daily.matches + ?
+            FROM ({sides}) AS s
+            WHERE player_daily.discord_id = s.discord_id AND player_daily.day = date(s.match_date)
+        ''', (sign,) * 7 + (match['id'], match['id']))
+        # Ranks are cumulative, so every later day's ranks change too
+        cursor.execute('SELECT date(?)', (match['match_date'],))
+        DatabaseManager._mark_ranks_stale(cursor, cursor.fetchone()[0])
+    
+    @staticmethod
+    def _record_correction(cursor, action, old, new=None):
+        cursor.execute('''
+            INSERT INTO match_corrections (match_id, action, old_values, new_values)
+            VALUES (?, ?, ?, ?)
+        ''', (old['id'], action, json.dumps(dict(old)), json.dumps(new) if new else None))
+    
+    @staticmethod
+    def _void_match(cursor, match_id):
+        cursor.execute('SELECT * FROM matches WHERE id = ?', (match_id,))
+        match = cursor.fetchone()
+        if match is None:
+            return None
+        DatabaseManager._apply_match(cursor, match, sign=-1)
+        DatabaseManager._apply_daily(cursor, match, sign=-1)
+        cursor.execute('DELETE FROM matches WHERE id = ?', (match_id,))
+        DatabaseManager._record_correction(cursor, 'void', match)
+        return dict(match)
+    
+    def void_match(self, match_id):
+        """Remove a recorded match and exactly reverse its effect; returns the voided match or None"""
+        try:
+            match = self._write(self._void_match, match_id)
+            if match:
+                logger.info(f"Voided match {match_id}")
+                notify_match_changed(self.db_path, match)
+            return match
+        except Exception as e:
+            logger.error(f"Error voiding match: {e}")
+            return None
+    
+    @staticmethod
+    def _correct_match(cursor, match_id, result, p1_kills, p1_deaths, p2_kills, p2_deaths):
+        if result not in MATCH_RESULTS:
+            return None
+        cursor.execute('SELECT * FROM matches WHERE id = ?', (match_id,))
+        old = cursor.fetchone()
+        if old is None:
+            return None
+        
+        new = dict(old)
+        new['winner_id'] = DatabaseManager._winner_for(result, old['player1_id'], old['player2_id'])
+        # Counts left out keep the recorded values
+        for column, value in (('player1_kills', p1_kills), ('player1_deaths', p1_deaths),
+                              ('player2_kills', p2_kills), ('player2_deaths', p2_deaths)):
+            if value is not None:
+                new[column] = value
+        DatabaseManager._apply_match(cursor, old, sign=-1)
+        DatabaseManager._apply_daily(cursor, old, sign=-1)
+        cursor.execute('''
+            UPDATE matches SET winner_id = :winner_id,
+                               player1_kills = :player1_kills, player1_deaths = :player1_deaths,
+                               player2_kills = :player2_kills, player2_deaths = :player2_deaths
+            WHERE id = :id
+        ''', new)
+        DatabaseManager._apply_match(cursor, new)
+        DatabaseManager._apply_daily(cursor, new, sign=1)
+        DatabaseManager._record_correction(cursor, 'correct', old, new)
+        return new
+    
+    def correct_match(self, match_id, result, p1_kills=None, p1_deaths=None, p2_kills=None, p2_deaths=None):
+        """Replace a recorded match's result, applying only the difference; returns the corrected match or None.
+        
+        Kill and death counts left as None keep their recorded values.
+        """
+        try:
+            match = self._write(self._correct_match, match_id, result, p1_kills, p1_deaths, p2_kills, p2_deaths)
+            if match:
+                logger.info(f"Corrected match {match_id} to {result}")
+                notify_match_changed(self.db_path, match)
+            return match
+        except Exception as e:
+            logger.error(f"Error correcting match: {e}")
+            return None
+    
+    def get_match(self, match_id):
+        """Get a single match with player names"""
         try:
             with self.get_db_connection() as conn:
                 cursor = conn.cursor()
-                
-                # Check if both players exist
-                cursor.execute('SELECT discord_id FROM players WHERE discord_id IN (?, ?)', 
-                             (str(player1_id), str(player2_id)))
-                if len(cursor.fetchall()) != 2:
-                    return None
-                
                 cursor.execute('''
-                    INSERT INTO duels (player1_id, player2_id, scheduled_time)
-                    VALUES (?, ?, ?)
-                ''', (str(player1_id), str(player2_id), scheduled_time))
-                
-                duel_id = cursor.lastrowid
-                conn.commit()
+                    SELECT m.*, p1.player_name as player1_name, p2.player_name as player2_name
+                    FROM matches m
+                    LEFT JOIN players p1 ON m.player1_id = p1.discord_id
+                    LEFT JOIN players p2 ON m.player2_id = p2.discord_id
+                    WHERE m.id = ?
+                ''', (match_id,))
+                row = cursor.fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Error getting match: {e}")
+            return None
+    
+    def get_setting(self, key, default=None):
+        """Read a value from the settings table"""
+        try:
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
+                row = cursor.fetchone()
+                return row[0] if row else default
+        except Exception as e:
+            logger.error(f"Error reading setting {key}: {e}")
+            return default
+    
+    @staticmethod
+    def _set_setting(cursor, key, value):
+        cursor.execute('''
+            INSERT INTO settings (key, value) VALUES (?, ?)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value
+        ''', (key, value))
+    
+    def set_setting(self, key, value):
+        """Store a value in the settings table"""
+        try:
+            self._write(self._set_setting, key, value)
+            return True
+        except Exception as e:
+            logger.error(f"Error writing setting {key}: {e}")
+            return False
+    
+    def get_user_language(self, discord_id):
+        """A user's chosen language code, or None if they have not chosen one"""
+        try:
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT language FROM user_languages WHERE discord_id = ?', (str(discord_id),))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            logger.error(f"Error reading language of {discord_id}: {e}")
+            return None
+    
+    @staticmethod
+    def _set_user_language(cursor, discord_id, language):
+        cursor.execute('''
+            INSERT INTO user_languages (discord_id, language) VALUES (?, ?)
+            ON CONFLICT (discord_id) DO UPDATE SET language = excluded.language, updated_at = CURRENT_TIMESTAMP
+        ''', (str(discord_id), language))
+    
+    def set_user_language(self, discord_id, language):
+        """Store a user's chosen language code"""
+        try:
+            self._write(self._set_user_language, discord_id, language)
+            return True
+        except Exception as e:
+            logger.error(f"Error writing language of {discord_id}: {e}")
+            return False
+    
+    def get_server_address(self):
+        """The (ip, port) of this tournament's game server"""
+        return (self.get_setting('server_ip', DEFAULT_SERVER_IP),
+                self.get_setting('server_port', DEFAULT_SERVER_PORT))
+    
+    @staticmethod
+    def _set_server_address(cursor, ip, port):
+        DatabaseManager._set_setting(cursor, 'server_ip', ip)
+        DatabaseManager._set_setting(cursor, 'server_port', port)
+    
+    def set_server_address(self, ip, port):
+        """Store this tournament's game server address"""
+        try:
+            self._write(self._set_server_address, ip, str(port))
+            return True
+        except Exception as e:
+            logger.error(f"Error writing server address: {e}")
+            return False
+    
+    @staticmethod
+    def _active_season_id(cursor):
+        cursor.execute("SELECT value FROM settings WHERE key = 'active_season'")
+        return int(cursor.fetchone()[0])
+    
+    @staticmethod
+    def _add_season_stats(cursor, season_id, discord_id, wins, losses, draws, kills, deaths, points):
+        cursor.execute('''
+            INSERT INTO season_stats (season_id, discord_id, wins, losses, draws, kills, deaths, points)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (season_id, discord_id) DO UPDATE SET
+                wins = wins + excluded.wins,
+                losses = losses + excluded.losses,
+                draws = draws + excluded.draws,
+                kills = kills + excluded.kills,
+                deaths = deaths + excluded.deaths,
+                points = points + excluded.points
+        ''', (season_id, str(discord_id), int(wins), int(losses), int(draws), kills, deaths, points))
+    
+    @staticmethod
+    def _start_season(cursor, name):
+        season_id = DatabaseManager._active_season_id(cursor)
+        cursor.execute('UPDATE seasons SET ended_at = CURRENT_TIMESTAMP WHERE id = ?', (season_id,))
+        cursor.execute('INSERT INTO seasons (name) VALUES (?)', (name,))
+        new_season_id = cursor.lastrowid
+        cursor.execute("UPDATE settings SET value = ? WHERE key = 'active_season'", (new_season_id,))
+        return new_season_id
+    
+    def start_season(self, name):
+        """Close the active season and open a new one; returns the new season id"""
+        try:
+            season_id = self._write(self._start_season, name)
+            logger.info(f"Started season {season_id}: {name}")
+            return season_id
+        except Exception as e:
+            logger.error(f"Error starting season: {e}")
+            return None
+    
+    def get_active_season(self):
+        """Get the season currently receiving match results"""
+        try:
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT s.* FROM seasons s
+                    JOIN settings ON settings.key = 'active_season' AND s.id = CAST(settings.value AS INTEGER)
+                ''')
+                row = cursor.fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Error getting active season: {e}")
+            return None
+    
+    def get_seasons(self):
+        """Get all seasons, newest first"""
+        try:
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT * FROM seasons ORDER BY id DESC')
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error getting seasons: {e}")
+            return []
+    
+    def get_season_leaderboard(self, season_id, limit=20):
+        """Get the leaderboard for one season"""
+        try:
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT s.*, p.player_name, p.discord_name
+                    FROM season_stats s
+                    JOIN players p ON p.discord_id = s.discord_id
+                    WHERE s.season_id = ?
+                    ORDER BY s.points DESC, s.wins DESC, s.kills DESC
+                    LIMIT ?
+                ''', (season_id, limit))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error getting season leaderboard: {e}")
+            return []
+    
+    @staticmethod
+    def _rank_day(cursor, day):
+        """Recompute every player's end-of-day rank for one rolled-up day"""
+        cursor.execute('''
+            WITH totals AS (
+                SELECT discord_id, RANK() OVER (ORDER BY SUM(points) DESC) AS rank
+                FROM player_daily
+                WHERE day <= ? AND discord_id IN (SELECT discord_id FROM players)
+                GROUP BY discord_id
+            )
+            UPDATE player_daily SET rank = totals.rank
+            FROM totals
+            WHERE player_daily.day = ? AND player_daily.discord_id = totals.discord_id
+        ''', (day, day))
+    
+    @staticmethod
+    def _mark_ranks_stale(cursor, day):
+        """Have the next rollup recompute end-of-day ranks from ``day`` onwards"""
+        cursor.execute("SELECT value FROM settings WHERE key = 'rollup_rerank_from'")
+        row = cursor.fetchone()
+        if row is None or day < row[0]:
+            DatabaseManager._set_setting(cursor, 'rollup_rerank_from', day)
+    
+    @staticmethod
+    def _rerank_stale_days(cursor):
+        """Recompute ranks for every rolled-up day marked stale by a void or correction"""
+        cursor.execute("SELECT value FROM settings WHERE key = 'rollup_rerank_from'")
+        row = cursor.fetchone()
+        if row is None:
+            return 0
+        cursor.execute('SELECT DISTINCT day FROM player_daily WHERE day >= ? ORDER BY day', (row[0],))
+        days = [day for (day,) in cursor.fetchall()]
+        for day in days:
+            DatabaseManager._rank_day(cursor, day)
+        cursor.execute("DELETE FROM settings WHERE key = 'rollup_rerank_from'")
+        return len(days)
+    
+    @staticmethod
+    def _rollup_daily_stats(cursor, batch_size):
+        cursor.execute("SELECT value FROM settings WHERE key = 'rollup_match_id'")
+        row = cursor.fetchone()
+        watermark = int(row[0]) if row else 0
+        
+        cursor.execute('SELECT MAX(id) FROM (SELECT id FROM matches WHERE id > ? ORDER BY id LIMIT ?)',
+                       (watermark, batch_size))
+        last_id = cursor.fetchone()[0]
+        if last_id is None:
+            return 0
+        
+        sides = MATCH_SIDES_SQL.format(where='WHERE id > ? AND id <= ?')
+        cursor.execute(f'''
+            INSERT INTO player_daily (discord_id, day, points, wins, losses, draws, kills, deaths, matches)
+            SELECT discord_id, date(match_date), SUM(points), SUM(wins), SUM(losses), SUM(draws), SUM(kills), SUM(deaths), COUNT(*)
+            FROM ({sides})
+            GROUP BY discord_id, date(match_date)
+            ON CONFLICT (discord_id, day) DO UPDATE SET
+                points = points + excluded.points,
+                wins = wins + excluded.wins,
+                losses = losses + excluded.losses,
+                draws = draws + excluded.draws,
+                kills = kills + excluded.kills,
+                deaths = deaths + excluded.deaths,
+                matches = matches + excluded.matches
+        ''', (watermark, last_id, watermark, last_id))
+        
+        # Rank at end of day for every day touched by the new matches
+        cursor.execute('SELECT DISTINCT date(match_date) FROM matches WHERE id > ? AND id <= ?',
+                       (watermark, last_id))
+        for (day,) in cursor.fetchall():
+            DatabaseManager._rank_day(cursor, day)
+        
+        DatabaseManager._set_setting(cursor, 'rollup_match_id', last_id)
+        return last_id - watermark
+    
+    def _rollup_pending(self):
+        """Whether there are matches past the rollup watermark or days waiting to be re-ranked"""
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT EXISTS (
+                    SELECT 1 FROM matches
+                    WHERE id > COALESCE((SELECT CAST(value AS INTEGER) FROM settings WHERE key = 'rollup_match_id'), 0)
+                ) OR EXISTS (SELECT 1 FROM settings WHERE key = 'rollup_rerank_from')
+            ''')
+            return bool(cursor.fetchone()[0])
+    
+    def rollup_daily_stats(self, batch_size=5000):
+        """Fold matches newer than the rollup watermark into player_daily; returns the match id span processed.
+        
+        Days whose ranks were left stale by voids and corrections are re-ranked afterwards.
+        Nothing is queued on the writer when a read-only check finds no work.
+        """
+        try:
+            if not self._rollup_pending():
+                return 0
+            processed = 0
+            while True:
+                span = self._write(self._rollup_daily_stats, batch_size)
+                if not span:
+                    break
+                processed += span
+            reranked = self._write(self._rerank_stale_days)
+            if reranked:
+                logger.info(f"Re-ranked {reranked} days after match corrections")
+            return processed
+        except Exception as e:
+            logger.error(f"Error rolling up daily stats: {e}")
+            return 0
+    
+    @staticmethod
+    def _find_stat_drift(cursor):
+        sides = MATCH_SIDES_SQL.format(where='')
+        expected = ', '.join(f'SUM({column}) AS {column}' for column in STAT_COLUMNS)
+        compared = ', '.join(f'p.{column}, COALESCE(e.{column}, 0) AS expected_{column}' for column in STAT_COLUMNS)
+        drifted = ' OR '.join(f'p.{column} IS NOT COALESCE(e.{column}, 0)' for column in STAT_COLUMNS)
+        cursor.execute(f'''
+            WITH expected AS (
+                SELECT discord_id, {expected} FROM ({sides}) GROUP BY discord_id
+            )
+            SELECT p.discord_id, p.player_name, {compared}
+            FROM players p LEFT JOIN expected e ON e.discord_id = p.discord_id
+            WHERE {drifted}
+        ''')
+        return [
+            {
+                'discord_id': row['discord_id'],
+                'player_name': row['player_name'],
+                'stored': {column: row[column] for column in STAT_COLUMNS},
+                'expected': {column: row[f'expected_{column}'] for column in STAT_COLUMNS},
+            }
+            for row in cursor.fetchall()
+        ]
+    
+    @staticmethod
+    def _find_season_drift(cursor):
+        sides = MATCH_SIDES_SQL.format(where='WHERE season_id IS NOT NULL')
+        expected = ', '.join(f'SUM({column}) AS {column}' for column in STAT_COLUMNS)
+        compared = ', '.join(f'COALESCE(s.{column}, 0) AS {column}, COALESCE(e.{column}, 0) AS expected_{column}'
+                             for column in STAT_COLUMNS)
+        drifted = ' OR '.join(f'COALESCE(s.{column}, 0) IS NOT COALESCE(e.{column}, 0)' for column in STAT_COLUMNS)
+        cursor.execute(f'''
+            WITH expected AS (
+                SELECT season_id, discord_id, {expected} FROM ({sides}) GROUP BY season_id, discord_id
+            ),
+            season_players AS (
+                SELECT season_id, discord_id FROM season_stats
+                UNION
+                SELECT season_id, discord_id FROM expected
+            )
+            SELECT k.season_id, p.discord_id, p.player_name, {compared}
+            FROM season_players k
+            JOIN players p ON p.discord_id = k.discord_id
+            LEFT JOIN season_stats s ON s.season_id = k.season_id AND s.discord_id = k.discord_id
+            LEFT JOIN expected e ON e.season_id = k.season_id AND e.discord_id = k.discord_id
+            WHERE {drifted}
+            ORDER BY k.season_id, p.discord_id
+        ''')
+        return [
+            {
+                'discord_id': row['discord_id'],
+                'player_name': row['player_name'],
+                'season_id': row['season_id'],
+                'stored': {column: row[column] for column in STAT_COLUMNS},
+                'expected': {column: row[f'expected_{column}'] for column in STAT_COLUMNS},
+            }
+            for row in cursor.fetchall()
+        ]
+    
+    @staticmethod
+    def _find_all_drift(cursor):
+        return DatabaseManager._find_stat_drift(cursor) + DatabaseManager._find_season_drift(cursor)
+    
+    @staticmethod
+    def _repair_stat_drift(cursor):
+        discrepancies = DatabaseManager._find_stat_drift(cursor)
+        assignments = ', '.join(f'{column} = ?' for column in STAT_COLUMNS)
+        cursor.executemany(
+            f'UPDATE players SET {assignments} WHERE discord_id = ?',
+            [tuple(d['expected'][column] for column in STAT_COLUMNS) + (d['discord_id'],) for d in discrepancies]
+        )
+        
+        season_discrepancies = DatabaseManager._find_season_drift(cursor)
+        columns = ', '.join(STAT_COLUMNS)
+        placeholders = ', '.join('?' for _ in STAT_COLUMNS)
+        replaced = ', '.join(f'{column} = excluded.{column}' for column in STAT_COLUMNS)
+        cursor.executemany(
+            f'''
+                INSERT INTO season_stats (season_id, discord_id, {columns}) VALUES (?, ?, {placeholders})
+                ON CONFLICT (season_id, discord_id) DO UPDATE SET {replaced}
+            ''',
+            [(d['season_id'], d['discord_id']) + tuple(d['expected'][column] for column in STAT_COLUMNS)
+             for d in season_discrepancies]
+        )
+        
+        DatabaseManager._rebuild_head_to_head(cursor)
+        return discrepancies + season_discrepancies
+    
+    def reconcile_stats(self, repair=False):
+        """Recompute player and per-season aggregates from match history in grouped passes.
+        
+        Returns the counters that differ from their matches: all-time ones
+        from players, then per-season ones from season_stats, which carry
+        the season_id. With repair=True the differences are corrected, and
+        the head-to-head table rebuilt, in a single transaction.
+        """
+        try:
+            if repair:
+                discrepancies = self._write(self._repair_stat_drift)
+            else:
+                with self.get_db_connection() as conn:
+                    discrepancies = self._find_all_drift(conn.cursor())
+            if discrepancies:
+                action = "Repaired" if repair else "Found"
+                seasonal = sum(1 for d in discrepancies if 'season_id' in d)
+                logger.warning(f"{action} stat drift for {len(discrepancies) - seasonal} players "
+                               f"and {seasonal} season standings")
+            return discrepancies
+        except Exception as e:
+            logger.error(f"Error reconciling stats: {e}")
+            return None
+    
+    def get_player_timeline(self, discord_id, days=90):
+        """Get a player's daily progress from the rollup table, oldest first"""
+        try:
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT * FROM (
+                        SELECT day, points, wins, losses, draws, kills, deaths, matches, rank,
+                               SUM(points) OVER (ORDER BY day) AS total_points
+                        FROM player_daily WHERE discord_id = ?
+                    )
+                    ORDER BY day DESC
+                    LIMIT ?
+                ''', (str(discord_id), days))
+                return [dict(row) for row in reversed(cursor.fetchall())]
+        except Exception as e:
+            logger.error(f"Error getting player timeline: {e}")
+            return []
+    
+    @staticmethod
+    def _enqueue_notification(cursor, kind, recipient_id, deliver_at, duel_id=None, payload=None):
+        cursor.execute('''
+            INSERT INTO notifications (kind, recipient_id, duel_id, payload, deliver_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (kind, str(recipient_id), duel_id, json.dumps(payload) if payload else None, deliver_at))
+    
+    @classmethod
+    def _enqueue_duel_reminders(cls, cursor, duel_id, player1_id, player2_id, scheduled_time):
+        """Queue a reminder to each side of a duel, DUEL_REMINDER_LEAD before it starts"""
+        deliver_at = max(scheduled_time - DUEL_REMINDER_LEAD, datetime.utcnow())
+        for recipient_id, opponent_id in ((player1_id, player2_id), (player2_id, player1_id)):
+            cls._enqueue_notification(cursor, 'duel_reminder', recipient_id, deliver_at,
+                                      duel_id, {'opponent_id': str(opponent_id)})
+    
+    @classmethod
+    def _schedule_duel(cls, cursor, player1_id, player2_id, scheduled_time):
+        # Check if both players exist
+        cursor.execute('SELECT discord_id FROM players WHERE discord_id IN (?, ?)', 
+                     (str(player1_id), str(player2_id)))
+        if len(cursor.fetchall()) != 2:
+            return None
+        
+        cursor.execute('''
+            INSERT INTO duels (player1_id, player2_id, scheduled_time)
+            VALUES (?, ?, ?)
+        ''', (str(player1_id), str(player2_id), scheduled_time))
+        duel_id = cursor.lastrowid
+        
+        # Notifications commit with the duel, so none can be lost between the two
+        now = datetime.utcnow()
+        for recipient_id, opponent_id in ((player1_id, player2_id), (player2_id, player1_id)):
+            cls._enqueue_notification(cursor, 'duel_scheduled', recipient_id, now, duel_id,
+                                      {'opponent_id': str(opponent_id)})
+        cls._enqueue_duel_reminders(cursor, duel_id, player1_id, player2_id, scheduled_time)
+        return duel_id
+    
+    def schedule_duel(self, player1_id, player2_id, scheduled_time):
+        """Schedule a duel between two players and queue its notifications"""
+        try:
+            duel_id = self._write(self._schedule_duel, player1_id, player2_id, scheduled_time)
+            if duel_id:
                 logger.info(f"Scheduled duel: {player1_id} vs {player2_id} at {scheduled_time}")
-                return duel_id
+            return duel_id
                 
         except Exception as e:
             logger.error(f"Error scheduling duel: {e}")
             return None
     
-    def get_upcoming_duels(self):
-        """Get duels that need reminders (5 minutes before start)"""
+    def get_due_notifications(self, limit=50):
+        """Pending notifications whose delivery time has come, oldest first, with their duel"""
         try:
             with self.get_db_connection() as conn:
                 cursor = conn.cursor()
-                reminder_time = datetime.utcnow() + timedelta(minutes=5)
-                
                 cursor.execute('''
-                    SELECT * FROM duels 
-                    WHERE reminder_sent = FALSE 
-                    AND completed = FALSE 
-                    AND scheduled_time <= ?
-                    AND scheduled_time > ?
-                ''', (reminder_time, datetime.utcnow()))
-                
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                    SELECT n.*, d.scheduled_time, d.completed
+                    FROM notifications n
+                    LEFT JOIN duels d ON d.id = n.duel_id
+                    WHERE n.status = 'pending' AND n.deliver_at <= ?
+                    ORDER BY n.deliver_at, n.id
+                    LIMIT ?
+                ''', (datetime.utcnow(), limit))
+                notifications = []
+                for row in cursor.fetchall():
+                    notification = dict(row)
+                    notification['payload'] = json.loads(row['payload']) if row['payload'] else {}
+                    notifications.append(notification)
+                return notifications
         except Exception as e:
-            logger.error(f"Error getting upcoming duels: {e}")
+            logger.error(f"Error getting due notifications: {e}")
             return []
     
-    def mark_reminder_sent(self, duel_id):
-        """Mark reminder as sent for a duel"""
+    @staticmethod
+    def _record_deliveries(cursor, results):
+        delivered = [(notification_id,) for notification_id, outcome, _ in results if outcome == 'sent']
+        cursor.executemany('''
+            UPDATE notifications SET status = 'sent', attempts = attempts + 1, sent_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', delivered)
+        cursor.executemany('''
+            UPDATE notifications SET status = ?, last_error = ? WHERE id = ?
+        ''', [(outcome, error, notification_id) for notification_id, outcome, error in results
+              if outcome in ('failed', 'expired')])
+        # Retries back off exponentially until the attempt limit, then fail
+        cursor.executemany('''
+            UPDATE notifications
+            SET attempts = attempts + 1,
+                last_error = ?,
+                status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,
+                deliver_at = datetime('now', '+' || min(? * (1 << attempts), ?) || ' seconds')
+            WHERE id = ?
+        ''', [(error, NOTIFICATION_MAX_ATTEMPTS, NOTIFICATION_RETRY_SECONDS, NOTIFICATION_MAX_BACKOFF, notification_id)
+              for notification_id, outcome, error in results if outcome == 'retry'])
+        
+        # A duel's reminder is settled once neither side has one pending
+        cursor.execute(f'''
+            UPDATE duels SET reminder_sent = TRUE
+            WHERE id IN (SELECT duel_id FROM notifications WHERE id IN ({", ".join("?" * len(results))}))
+            AND NOT EXISTS (SELECT 1 FROM notifications
+                            WHERE duel_id = duels.id AND kind = 'duel_reminder' AND status = 'pending')
+        ''', [notification_id for notification_id, _, _ in results])
+        cursor.execute('''
+            DELETE FROM notifications
+            WHERE status IN ('sent', 'expired') AND created_at < datetime('now', ?)
+        ''', (f'-{NOTIFICATION_RETENTION_DAYS} days',))
+        return len(delivered)
+    
+    def record_deliveries(self, results):
+        """Store (notification_id, outcome, error) results; outcome is sent, retry, failed or expired"""
+        if not results:
+            return True
+        try:
+            self._write(self._record_deliveries, results)
+            return True
+        except Exception as e:
+            logger.error(f"Error recording notification deliveries: {e}")
+            return False
+    
+    def get_outbox_depth(self):
+        """Counts of pending, due and failed notifications, plus the next pending delivery time"""
         try:
             with self.get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('UPDATE duels SET reminder_sent = TRUE WHERE id = ?', (duel_id,))
-                conn.commit()
+                cursor.execute('''
+                    SELECT
+                        COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+                        COUNT(*) FILTER (WHERE status = 'pending' AND deliver_at <= ?) AS due,
+                        COUNT(*) FILTER (WHERE status = 'failed') AS failed,
+                        MIN(deliver_at) FILTER (WHERE status = 'pending') AS next_delivery
+                    FROM notifications
+                    WHERE status IN ('pending', 'failed')
+                ''', (datetime.utcnow(),))
+                return dict(cursor.fetchone())
         except Exception as e:
-            logger.error(f"Error marking reminder sent: {e}")
+            logger.error(f"Error getting outbox depth: {e}")
+            return None
     
-    def get_recent_matches(self, limit=10):
-        """Get recent match history"""
+    def get_recent_matches(self, limit=10, after_id=0, columns=MATCH_COLUMNS):
+        """Get recent match history, optionally only matches newer than after_id"""
         try:
             with self.get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT m.*, p1.player_name as player1_name, p2.player_name as player2_name,
-                           pw.player_name as winner_name
+                cursor.execute(f'''
+                    SELECT {", ".join(MATCH_COLUMN_SQL[column] for column in columns)}
                     FROM matches m
                     JOIN players p1 ON m.player1_id = p1.discord_id
                     JOIN players p2 ON m.player2_id = p2.discord_id
                     LEFT JOIN players pw ON m.winner_id = pw.discord_id
-                    ORDER BY m.match_date DESC
+                    WHERE m.id > ?
+                    ORDER BY m.match_date DESC, m.id DESC
                     LIMIT ?
-                ''', (limit,))
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                ''', (after_id, limit))
+                return fetch_rows(cursor, columns)
         except Exception as e:
             logger.error(f"Error getting recent matches: {e}")
             return []
+
+tracing.trace_methods(DatabaseManager, 'db', exclude={'init_database', 'get_db_connection', 'submit'})
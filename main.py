@@ -1,4 +1,5 @@
 import os
+import asyncio
 import threading
 import logging
 import time
@@ -17,15 +18,25 @@ def run_discord_bot():
     except Exception as e:
         logger.error(f"❌ Error in Discord bot: {e}")
 
-# Start Discord bot in background thread when module is imported
-bot_thread = threading.Thread(target=run_discord_bot, daemon=True)
-bot_thread.start()
-logger.info("🤖 Discord bot thread started")
+# RUN_MODE=threaded (default) runs Flask and the bot in separate threads;
+# RUN_MODE=asyncio serves both from one event loop (see asgi.py)
+RUN_MODE = os.getenv('RUN_MODE', 'threaded')
 
-# Give bot some time to initialize
-time.sleep(1)
+if RUN_MODE != 'asyncio':
+    # Start Discord bot in background thread when module is imported
+    bot_thread = threading.Thread(target=run_discord_bot, daemon=True)
+    bot_thread.start()
+    logger.info("🤖 Discord bot thread started")
+
+    # Give bot some time to initialize
+    time.sleep(1)
 
 # This is for gunicorn compatibility
 if __name__ == "__main__":
-    logger.info("🌐 Starting Flask app directly...")
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    if RUN_MODE == 'asyncio':
+        logger.info("🌐 Starting bot and web app on a single event loop...")
+        from asgi import run_single_process
+        asyncio.run(run_single_process())
+    else:
+        logger.info("🌐 Starting Flask app directly...")
+        app.run(host='0.0.0.0', port=5000, debug=False)
@@ -0,0 +1,246 @@
+"""Online backups and routine SQLite maintenance for the tournament database.
+
+The bot runs MaintenanceScheduler.run_due() periodically:
+
+* Backups copy the live database with the sqlite3 backup API a few pages
+  at a time, sleeping between steps so the writer is never held up for
+  long, then keep the newest BACKUP_KEEP copies.
+* During quiet periods (no committed writes for QUIET_SECONDS) it runs
+  ANALYZE with a bounded analysis limit, PRAGMA optimize and incremental
+  vacuum in small chunks on the writer thread.
+
+Every step's lock time is measured. Backup steps and vacuum chunks adapt
+their size to stay under MAX_LOCK_MS, and the longest hold is logged.
+"""
+import glob
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+BACKUP_INTERVAL_HOURS = float(os.getenv('BACKUP_INTERVAL_HOURS', '6'))
+BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', '7'))
+MAINTENANCE_INTERVAL_HOURS = float(os.getenv('MAINTENANCE_INTERVAL_HOURS', '24'))
+
+# Longest a single backup step or maintenance operation may hold the database
+MAX_LOCK_MS = float(os.getenv('MAINTENANCE_MAX_LOCK_MS', '100'))
+
+# Maintenance waits until no write has been committed for this long
+QUIET_SECONDS = 120
+
+# Pause between backup steps, letting the writer in
+BACKUP_STEP_SLEEP = 0.05
+BACKUP_START_PAGES = 256
+
+# Rows sampled per index by ANALYZE, bounding how long it runs
+ANALYSIS_LIMIT = 1000
+
+VACUUM_START_PAGES = 256
+# Total time one maintenance run may spend on incremental vacuum
+VACUUM_BUDGET_SECONDS = 5
+
+# Databases without incremental auto-vacuum are converted with a one-off
+# VACUUM, but only when small enough for it to finish quickly
+VACUUM_CONVERT_MAX_BYTES = 16 * 1024 * 1024
+
+def _analyze(cursor, table):
+    start = time.perf_counter()
+    cursor.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+    cursor.execute(f'ANALYZE "{table}"')
+    return time.perf_counter() - start
+
+def _optimize(cursor):
+    start = time.perf_counter()
+    cursor.execute('PRAGMA optimize')
+    return time.perf_counter() - start
+
+def _incremental_vacuum(cursor, pages):
+    start = time.perf_counter()
+    # sqlite3 steps a row-less statement once, and each step frees one page
+    for _ in range(int(pages)):
+        cursor.execute('PRAGMA incremental_vacuum')
+    cursor.execute('PRAGMA freelist_count')
+    return time.perf_counter() - start, cursor.fetchone()[0]
+
+def _record_run(cursor, setting):
+    DatabaseManager._set_setting(cursor, setting, datetime.utcnow().isoformat())
+
+# Writer operations run by maintenance itself, which do not count as activity
+MAINTENANCE_OPS = (_analyze, _optimize, _incremental_vacuum, _record_run)
+
+def adapt_step(size, elapsed_ms, minimum=16, maximum=65536):
+    """Halve a step size that held the lock too long, double one well under the cap"""
+    if elapsed_ms > MAX_LOCK_MS:
+        return max(minimum, size // 2)
+    if elapsed_ms < MAX_LOCK_MS / 4:
+        return min(maximum, size * 2)
+    return size
+
+class MaintenanceScheduler:
+    """Decides when backups and maintenance are due and runs them"""
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+        self.backup_pages = BACKUP_START_PAGES
+        self.vacuum_pages = VACUUM_START_PAGES
+        self._last_write = time.monotonic()
+        db_manager.writer.add_listener(self._on_commit)
+
+    def _on_commit(self, version):
+        # Runs on the writer thread, so last_batch is the batch just committed.
+        # Batches that modified nothing never get here (see WriteQueue._commit_batch).
+        batch = self.db.writer.last_batch
+        if batch and all(op in MAINTENANCE_OPS for op in batch):
+            return
+        self._last_write = time.monotonic()
+
+    def _run_on_writer(self, op, *args):
+        """Run a maintenance operation on the writer thread; its commit is not counted as activity"""
+        return self.db.submit(op, *args).result()
+
+    def quiet(self):
+        """True when nothing has been written for QUIET_SECONDS"""
+        return time.monotonic() - self._last_write >= QUIET_SECONDS
+
+    def _due(self, setting, interval_hours):
+        last = self.db.get_setting(setting)
+        if not last:
+            return True
+        return (datetime.utcnow() - datetime.fromisoformat(last)).total_seconds() >= interval_hours * 3600
+
+    def run_due(self):
+        """Run whichever of backup and maintenance are due; returns their reports"""
+        reports = {}
+        # Decided up front so the backup cannot make the database look busy
+        quiet = self.quiet()
+        if self._due('last_backup_at', BACKUP_INTERVAL_HOURS):
+            reports['backup'] = self.backup()
+        if self._due('last_maintenance_at', MAINTENANCE_INTERVAL_HOURS) and quiet:
+            reports['maintenance'] = self.maintain()
+        return reports
+
+    def backup(self):
+        """Copy the live database to BACKUP_DIR in small page steps"""
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        name = os.path.splitext(os.path.basename(self.db.db_path))[0]
+        path = os.path.join(BACKUP_DIR, f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.db")
+        steps = []
+        last = [time.perf_counter()]
+
+        def progress(status, remaining, total):
+            now = time.perf_counter()
+            steps.append((now - last[0] - (BACKUP_STEP_SLEEP if steps else 0)) * 1000)
+            last[0] = now
+
+        start = time.perf_counter()
+        try:
+            source = sqlite3.connect(self.db.db_path)
+            target = sqlite3.connect(path + '.tmp')
+            try:
+                source.backup(target, pages=self.backup_pages, progress=progress, sleep=BACKUP_STEP_SLEEP)
+                check = target.execute('PRAGMA quick_check').fetchone()[0]
+            finally:
+                target.close()
+                source.close()
+            if check != 'ok':
+                raise sqlite3.DatabaseError(f"backup failed quick_check: {check}")
+            os.replace(path + '.tmp', path)
+        except Exception as e:
+            logger.error(f"Error backing up database: {e}")
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
+            return None
+
+        longest = max(steps, default=0.0)
+        report = {
+            'path': path,
+            'bytes': os.path.getsize(path),
+            'seconds': round(time.perf_counter() - start, 3),
+            'steps': len(steps),
+            'pages_per_step': self.backup_pages,
+            'max_lock_ms': round(longest, 2),
+        }
+        self.backup_pages = adapt_step(self.backup_pages, longest)
+        self._run_on_writer(_record_run, 'last_backup_at')
+        self._prune_backups(name)
+        logger.info(f"💾 Backed up database to {path} in {report['seconds']}s "
+                    f"({report['steps']} steps, longest lock {report['max_lock_ms']}ms)")
+        return report
+
+    def _prune_backups(self, name):
+        backups = sorted(glob.glob(os.path.join(BACKUP_DIR, f"{name}-*.db")))
+        for old in backups[:-BACKUP_KEEP]:
+            os.remove(old)
+
+    def _tables(self):
+        with self.db.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT name FROM sqlite_master
+                WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE 'CREATE VIRTUAL%'
+            ''')
+            return [row['name'] for row in cursor.fetchall()]
+
+    def _auto_vacuum_mode(self):
+        with self.db.get_db_connection() as conn:
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+            return conn.execute('PRAGMA auto_vacuum').fetchone()[0], page_size * page_count
+
+    def _convert_to_incremental_vacuum(self, size):
+        """One-off VACUUM that switches a small legacy database to incremental auto-vacuum"""
+        start = time.perf_counter()
+        conn = sqlite3.connect(self.db.db_path, timeout=1)
+        try:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        finally:
+            conn.close()
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"🧹 Converted {size // 1024} KB database to incremental auto-vacuum ({elapsed:.0f}ms lock)")
+        return elapsed
+
+    def maintain(self):
+        """ANALYZE, PRAGMA optimize and incremental vacuum, one short writer operation at a time"""
+        locks = []
+        start = time.perf_counter()
+        try:
+            for table in self._tables():
+                locks.append(self._run_on_writer(_analyze, table) * 1000)
+                if not self.quiet():
+                    logger.info("🧹 Writes resumed, deferring the rest of maintenance")
+                    return None
+            locks.append(self._run_on_writer(_optimize) * 1000)
+
+            mode, size = self._auto_vacuum_mode()
+            if mode == 0 and size <= VACUUM_CONVERT_MAX_BYTES:
+                try:
+                    locks.append(self._convert_to_incremental_vacuum(size))
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"Could not convert database to incremental auto-vacuum: {e}")
+            elif mode == 2:
+                deadline = time.perf_counter() + VACUUM_BUDGET_SECONDS
+                free_pages = None
+                while free_pages != 0 and time.perf_counter() < deadline and self.quiet():
+                    elapsed, free_pages = self._run_on_writer(_incremental_vacuum, self.vacuum_pages)
+                    locks.append(elapsed * 1000)
+                    self.vacuum_pages = adapt_step(self.vacuum_pages, elapsed * 1000)
+        except Exception as e:
+            logger.error(f"Error during database maintenance: {e}")
+            return None
+
+        report = {
+            'seconds': round(time.perf_counter() - start, 3),
+            'operations': len(locks),
+            'max_lock_ms': round(max(locks, default=0.0), 2),
+        }
+        self._run_on_writer(_record_run, 'last_maintenance_at')
+        logger.info(f"🧹 Database maintenance finished in {report['seconds']}s "
+                    f"({report['operations']} operations, longest lock {report['max_lock_ms']}ms)")
+        return report
@@ -0,0 +1,38 @@
+"""Check player and season aggregates against match history, optionally repairing drift.
+
+Usage: python reconcile.py [--repair] [--db tournament.db]
+"""
+import argparse
+import logging
+import sys
+import time
+
+from database import DatabaseManager, STAT_COLUMNS
+
+logging.basicConfig(level=logging.WARNING)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repair', action='store_true', help='rewrite drifted counters in one transaction')
+    parser.add_argument('--db', default='tournament.db', help='database file (default: tournament.db)')
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    start = time.perf_counter()
+    discrepancies = db.reconcile_stats(repair=args.repair)
+    elapsed = time.perf_counter() - start
+    if discrepancies is None:
+        print("Reconciliation failed, see log for details")
+        return 2
+
+    for d in discrepancies:
+        changes = ', '.join(f"{column} {d['stored'][column]} -> {d['expected'][column]}"
+                            for column in STAT_COLUMNS if d['stored'][column] != d['expected'][column])
+        season = f" season #{d['season_id']}" if 'season_id' in d else ''
+        print(f"{d['player_name']} ({d['discord_id']}){season}: {changes}")
+    status = "repaired" if args.repair else "found"
+    print(f"{len(discrepancies)} drifted counters {status} in {elapsed:.2f}s")
+    return 1 if discrepancies and not args.repair else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import logging
+import queue
+import threading
+from bisect import bisect_left
+from typing import NamedTuple
+
+from database import add_external_change_listener, add_match_listener
+
+logger = logging.getLogger(__name__)
+
+# Number of recent matches kept in the snapshot (largest page that shows them)
+RECENT_MATCHES = 20
+
+def _leaderboard_key(player):
+    return (-player['points'], -player['wins'], -player['kills'])
+
+class Snapshot(NamedTuple):
+    """Immutable view of the tournament data served to the web tier"""
+    version: int
+    players: tuple
+    leaderboard: tuple
+    recent_matches: tuple
+
+    @property
+    def total_players(self):
+        return len(self.players)
+
+    def top_players(self, limit):
+        return self.leaderboard[:max(limit, 0)]
+
+    def latest_matches(self, limit):
+        return self.recent_matches[:max(limit, 0)]
+
+EMPTY_SNAPSHOT = Snapshot(version=-1, players=(), leaderboard=(), recent_matches=())
+
+class MatchmakingIndex:
+    """Players sorted by points, for closest-skill opponent lookups.
+
+    Built once per data version from a snapshot's leaderboard and the recent
+    pairings in ``matches``. A lookup bisects to the player's points and walks
+    outwards to both sides, taking whichever neighbour is closer and skipping
+    recent opponents, so it costs O(log n + limit + skipped).
+    """
+    __slots__ = ('version', 'points', 'players', 'ratings', 'recent')
+
+    def __init__(self, version, leaderboard, pairings):
+        # The leaderboard is already ordered by points, highest first
+        ranked = leaderboard[::-1]
+        self.version = version
+        self.points = [player['points'] for player in ranked]
+        self.players = ranked
+        self.ratings = {player['discord_id']: player['points'] for player in ranked}
+        # Both orders of every recent pairing
+        self.recent = set(pairings)
+        self.recent.update([(player2_id, player1_id) for player1_id, player2_id in pairings])
+
+    def suggest(self, discord_id, limit=5):
+        """Up to ``limit`` closest-rated players not met recently, nearest first; None if unregistered"""
+        discord_id = str(discord_id)
+        target = self.ratings.get(discord_id)
+        if target is None:
+            return None
+        recent = self.recent
+        points, players = self.points, self.players
+        below = bisect_left(points, target) - 1
+        above = below + 1
+        suggestions = []
+        while len(suggestions) < limit and (below >= 0 or above < len(points)):
+            if above >= len(points) or (below >= 0 and target - points[below] <= points[above] - target):
+                candidate = players[below]
+                below -= 1
+            else:
+                candidate = players[above]
+                above += 1
+            candidate_id = candidate['discord_id']
+            if candidate_id != discord_id and (discord_id, candidate_id) not in recent:
+                suggestions.append(candidate)
+        return suggestions
+
+class SnapshotStore:
+    """Holds the current Snapshot and rebuilds it when the data version changes.
+
+    Readers never touch the database while the version is unchanged. When it
+    moves, one thread rebuilds: players are reloaded, but only matches newer
+    than the last snapshot are fetched and merged into the recent list. The
+    new snapshot replaces the old one with a single reference assignment.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._snapshot = EMPTY_SNAPSHOT
+        self._lock = threading.Lock()
+        self._matchmaking = None
+        self._matchmaking_lock = threading.Lock()
+        add_match_listener(self._on_match_changed)
+        add_external_change_listener(self._on_external_change)
+
+    def _on_match_changed(self, db_path, match):
+        if db_path == self.db_manager.db_path:
+            self.invalidate(match)
+
+    def _on_external_change(self, db_path):
+        # Another process may have changed anything, not just appended matches
+        if db_path == self.db_manager.db_path:
+            self.invalidate()
+
+    def invalidate(self, match=None):
+        """Force a full rebuild, e.g. after a recorded match was voided or corrected"""
+        with self._lock:
+            self._snapshot = EMPTY_SNAPSHOT
+            self._matchmaking = None
+
+    def current(self):
+        """Return an up-to-date snapshot"""
+        snapshot = self._snapshot
+        if snapshot.version == self.db_manager.data_version:
+            return snapshot
+        with self._lock:
+            if self._snapshot.version != self.db_manager.data_version:
+                self._snapshot = self._rebuild(self._snapshot)
+            return self._snapshot
+
+    def matchmaking(self):
+        """Return the MatchmakingIndex for the current snapshot, building it on first use"""
+        snapshot = self.current()
+        index = self._matchmaking
+        if index is not None and index.version == snapshot.version:
+            return index
+        with self._matchmaking_lock:
+            index = self._matchmaking
+            if index is None or index.version != snapshot.version:
+                index = self._matchmaking = MatchmakingIndex(
+                    snapshot.version, snapshot.leaderboard, self.db_manager.get_recent_pairings())
+            return index
+
+    def _rebuild(self, previous):
+        # Read the version first so a write racing the rebuild triggers another one
+        version = self.db_manager.data_version
+        players = tuple(self.db_manager.get_all_players())
+
+        current_ids = {player['discord_id'] for player in players}
+        players_kept = all(player['discord_id'] in current_ids for player in previous.players)
+
+        if previous.recent_matches and players_kept:
+            last_id = max(match['id'] for match in previous.recent_matches)
+            new_matches = self.db_manager.get_recent_matches(RECENT_MATCHES, after_id=last_id)
+            recent_matches = (tuple(new_matches) + previous.recent_matches)[:RECENT_MATCHES]
+        else:
+            # First build, or players were removed and their matches drop out of the join
+            recent_matches = tuple(self.db_manager.get_recent_matches(RECENT_MATCHES))
+
+        logger.debug(f"Rebuilt read snapshot at data version {version}")
+        return Snapshot(
+            version=version,
+            players=players,
+            leaderboard=tuple(sorted(players, key=_leaderboard_key)),
+            recent_matches=recent_matches,
+        )
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_snapshot_store(db_manager):
+    """Return the shared SnapshotStore for a database file, so the bot and web tier use one cache"""
+    with _stores_lock:
+        store = _stores.get(db_manager.db_path)
+        if store is None:
+            store = _stores[db_manager.db_path] = SnapshotStore(db_manager)
+        return store
+
+def diff_snapshots(old, new):
+    """Compact description of what changed between two snapshots"""
+    old_ranks = {player['discord_id']: rank for rank, player in enumerate(old.leaderboard, 1)}
+    new_ids = set()
+    rank_changes = []
+    registrations = []
+    for rank, player in enumerate(new.leaderboard, 1):
+        discord_id = player['discord_id']
+        new_ids.add(discord_id)
+        previous_rank = old_ranks.get(discord_id)
+        if previous_rank is None:
+            registrations.append({'discord_id': discord_id, 'player_name': player['player_name']})
+        if previous_rank != rank:
+            rank_changes.append({
+                'discord_id': discord_id,
+                'player_name': player['player_name'],
+                'rank': rank,
+                'previous_rank': previous_rank,
+                'points': player['points'],
+            })
+
+    last_match_id = max((match['id'] for match in old.recent_matches), default=0)
+    return {
+        'version': new.version,
+        'rank_changes': rank_changes,
+        'new_matches': [match for match in new.recent_matches if match['id'] > last_match_id],
+        'registrations': registrations,
+        'removed': [discord_id for discord_id in old_ranks if discord_id not in new_ids],
+        'total_players': new.total_players,
+    }
+
+class ChangeFeed:
+    """One shared change feed fanned out to every live subscriber.
+
+    Commits on the writer thread wake a single feed thread, which refreshes
+    the snapshot once, diffs it against the previous one and pushes the diff
+    to each subscriber queue. Slow subscribers whose queue is full are
+    dropped rather than allowed to stall the others.
+    """
+
+    def __init__(self, store, queue_size=64):
+        self.store = store
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._thread = None
+
+    def subscribe(self, subscriber=None):
+        """Register a subscriber (any object with put_nowait) and return it; defaults to a new queue"""
+        if subscriber is None:
+            subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self.store.db_manager.writer.add_listener(lambda version: self._changed.set())
+                self._thread = threading.Thread(target=self._run, name=f"change-feed:{self.store.db_manager.db_path}",
+                                                daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def __contains__(self, subscriber):
+        return subscriber in self._subscribers
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                logger.warning("Dropping slow change feed subscriber")
+                self.unsubscribe(subscriber)
+
+    def _run(self):
+        previous = self.store.current()
+        while True:
+            self._changed.wait()
+            self._changed.clear()
+            try:
+                current = self.store.current()
+                if current.version != previous.version:
+                    self.publish(diff_snapshots(previous, current))
+                    previous = current
+            except Exception as e:
+                logger.error(f"Error in change feed: {e}")
+
+_feeds = {}
+
+def get_change_feed(store):
+    """Return the shared ChangeFeed for a SnapshotStore's database file"""
+    with _stores_lock:
+        feed = _feeds.get(store.db_manager.db_path)
+        if feed is None:
+            feed = _feeds[store.db_manager.db_path] = ChangeFeed(store)
+        return feed
@@ -0,0 +1,35 @@
+import threading
+import time
+
+import maintenance
+from database import DatabaseManager
+from maintenance import MaintenanceScheduler
+
+def test_maintenance_runs_on_idle_database_with_rollup_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(maintenance, 'BACKUP_DIR', str(tmp_path / 'backups'))
+    monkeypatch.setattr(maintenance, 'QUIET_SECONDS', 0.5)
+    db = DatabaseManager(str(tmp_path / 'tournament.db'))
+    db.add_player('1', 'Alpha', 'alpha')
+    db.add_player('2', 'Bravo', 'bravo')
+    db.update_match_result('1', '2', 'player1_win', 3, 1, 1, 3)
+    scheduler = MaintenanceScheduler(db)
+
+    # Stand-in for the bot's rollup_job, folding in the match above and then idling
+    stop = threading.Event()
+    def rollup_loop():
+        while not stop.is_set():
+            db.rollup_daily_stats()
+            stop.wait(0.05)
+    rollup = threading.Thread(target=rollup_loop)
+    rollup.start()
+    try:
+        time.sleep(1.0)
+        reports = scheduler.run_due()
+    finally:
+        stop.set()
+        rollup.join()
+
+    assert reports['backup'] is not None
+    assert reports['maintenance'] is not None
+    assert db.get_setting('last_maintenance_at') is not None
+    assert scheduler.quiet()
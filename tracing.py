@@ -0,0 +1,292 @@
+"""Lightweight span tracing, exported as OTLP/JSON lines.
+
+Entry points (slash commands, web requests, background tasks) start a root
+span for a sampled fraction of calls; DatabaseManager calls, writer thread
+operations, SQL statements and Discord HTTP requests made while a sampled
+trace is active are recorded beneath it. Unsampled calls cost one
+context variable lookup.
+
+Each finished trace is appended to TRACE_FILE as one ExportTraceServiceRequest
+JSON object per line, the format OTLP/HTTP collectors accept.
+
+Configuration:
+    TRACE_SAMPLE_RATE  fraction of entry points traced, 0 (off) to 1 (default 0)
+    TRACE_FILE         output file (default traces.jsonl)
+    TRACE_SERVICE      service.name resource attribute (default duel-lords)
+"""
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+TRACE_SERVICE = os.getenv('TRACE_SERVICE', 'duel-lords')
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+def enabled():
+    return TRACE_SAMPLE_RATE > 0
+
+def current_span():
+    """The active span of this thread or task, or None outside a sampled trace"""
+    return _current_span.get()
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+class Span:
+    """One timed operation within a trace"""
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'start', 'end',
+                 'attributes', 'events', 'error', '_token')
+
+    def __init__(self, trace, parent_id, name, kind, attributes):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = attributes
+        self.events = []
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def add_event(self, name, **attributes):
+        self.events.append((time.time_ns(), name, attributes))
+
+    def finish(self, error=None):
+        """End the span, restoring its parent as the current span"""
+        self.end = time.time_ns()
+        if error is not None:
+            self.error = error
+            self.add_event('exception', **{'exception.type': type(error).__name__,
+                                           'exception.message': str(error)})
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Finished from another context than it was started in
+                pass
+        self.trace.finished(self)
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': _otlp_attributes(self.attributes),
+            'events': [{'timeUnixNano': str(at), 'name': name, 'attributes': _otlp_attributes(attributes)}
+                       for at, name, attributes in self.events],
+            'status': ({'code': STATUS_ERROR, 'message': str(self.error)} if self.error is not None
+                       else {'code': STATUS_OK}),
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+class Trace:
+    """Spans of one sampled trace, exported together when the root span ends"""
+    __slots__ = ('trace_id', 'spans', '_lock')
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def finished(self, span):
+        with self._lock:
+            self.spans.append(span)
+        if span.parent_id is None:
+            exporter.export(self)
+
+class FileExporter:
+    """Writes finished traces to a file from a background thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue(maxsize=10000)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def export(self, trace):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            logger.warning("Trace export queue full, dropping trace")
+
+    def _request(self, trace):
+        return {'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': TRACE_SERVICE})},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp() for span in trace.spans],
+            }],
+        }]}
+
+    def _write(self, traces):
+        with open(self.path, 'a') as f:
+            for trace in traces:
+                f.write(json.dumps(self._request(trace), separators=(',', ':')) + '\n')
+
+    def _drain(self, first=None):
+        traces = [first] if first is not None else []
+        while True:
+            try:
+                traces.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if traces:
+            self._write(traces)
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                self._drain(trace)
+            except Exception as e:
+                logger.error(f"Error exporting traces: {e}")
+
+    def flush(self):
+        """Write any queued traces now"""
+        try:
+            self._drain()
+        except Exception as e:
+            logger.error(f"Error exporting traces: {e}")
+
+exporter = FileExporter(TRACE_FILE)
+
+def begin(name, kind=SPAN_KIND_INTERNAL, attributes=None, root=False, activate=True):
+    """Start a span, returning it (or None when not recorded).
+
+    With root=True a new trace is sampled when no trace is active; otherwise
+    the span is only recorded inside an active trace. An activated span is
+    the parent of spans started before it finishes.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        if not root or TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+            return None
+        span = Span(Trace(), None, name, kind, attributes or {})
+    else:
+        span = Span(parent.trace, parent.span_id, name, kind, attributes or {})
+    if activate:
+        span._token = _current_span.set(span)
+    return span
+
+@contextmanager
+def span(name, kind=SPAN_KIND_INTERNAL, root=False, **attributes):
+    """Context manager around begin()/finish() that records exceptions"""
+    current = begin(name, kind, attributes, root)
+    if current is None:
+        yield None
+        return
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    current.finish()
+
+def start_trace(name, kind=SPAN_KIND_SERVER, **attributes):
+    """Root span for an entry point, traced for TRACE_SAMPLE_RATE of calls"""
+    return span(name, kind, root=True, **attributes)
+
+def traced(name=None):
+    """Decorator recording calls of a function or coroutine function as child spans"""
+    def decorate(function):
+        span_name = name or function.__qualname__
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await function(*args, **kwargs)
+                with span(span_name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return function(*args, **kwargs)
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def trace_methods(cls, prefix, exclude=()):
+    """Trace every public method defined on a class as ``<prefix>.<method>``"""
+    for attribute, value in list(vars(cls).items()):
+        if attribute.startswith('_') or attribute in exclude or not inspect.isfunction(value):
+            continue
+        setattr(cls, attribute, traced(f"{prefix}.{attribute}")(value))
+    return cls
+
+def record_statement(statement):
+    """sqlite3 trace callback: add each executed statement as an event on the current span"""
+    current = _current_span.get()
+    if current is not None:
+        current.add_event('db.statement', **{'db.statement': statement})
+
+def aiohttp_trace_config():
+    """aiohttp TraceConfig recording outgoing HTTP requests as client spans"""
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        context.span = begin(f"HTTP {params.method}", SPAN_KIND_CLIENT,
+                             {'http.method': params.method, 'http.url': str(params.url)}, activate=False)
+
+    async def on_request_end(session, context, params):
+        if context.span is not None:
+            context.span.set_attribute('http.status_code', params.response.status)
+            context.span.finish()
+
+    async def on_request_exception(session, context, params):
+        if context.span is not None:
+            context.span.finish(params.exception)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
@@ -1,4 +1,7 @@
 """Translation system for multi-language support"""
+import threading
+from collections import OrderedDict
+from string import Formatter
 
 TRANSLATIONS = {
     'en': {
@@ -55,7 +58,29 @@ TRANSLATIONS = {
         'no_players': 'No players registered yet!',
         'total_registered': 'Total registered players',
         'players': 'Players',
-        'matches': 'matches'
+        'matches': 'matches',
+        'language': 'English',
+        'copy_paste': 'Copy and paste into BombSquad',
+        'registered_description': 'Player **{player_name}** has been registered for the tournament!',
+        'discord_user': 'Discord User',
+        'player_name': 'Player Name',
+        'already_registered': 'Player is already registered or an error occurred.',
+        'player_not_found': 'Player Not Found',
+        'not_registered': '{mention} is not registered in the tournament.',
+        'statistics_for': 'Statistics for **{player_name}**',
+        'see_leaderboard': '/leaderboard for rankings',
+        'no_players_min': 'No players with {min_matches}+ matches yet!',
+        'wld': 'W/L/D',
+        'kd': 'K/D',
+        'sorted_by': 'Sorted by {sort} • Visit our website for full rankings',
+        'match_footer': 'Match #{match_id} • /correct_match or /void_match to fix mistakes',
+        'you_are_scheduled': 'You have been scheduled for a tournament match!',
+        'time': 'Time',
+        'reminder_footer': "You'll receive a reminder 5 minutes before the match",
+        'match_starts': 'Your tournament match starts {when}!',
+        'good_luck_short': 'Good luck!',
+        'language_updated': 'Language Updated',
+        'language_now': 'I will now reply to you in **{language_name}**.'
     },
     'pt': {
         'bot_name': 'Senhores do Duelo',
@@ -111,7 +136,29 @@ TRANSLATIONS = {
         'no_players': 'Nenhum jogador registrado ainda!',
         'total_registered': 'Total de jogadores registrados',
         'players': 'Jogadores',
-        'matches': 'partidas'
+        'matches': 'partidas',
+        'language': 'Português',
+        'copy_paste': 'Copie e cole no BombSquad',
+        'registered_description': 'O jogador **{player_name}** foi registrado no torneio!',
+        'discord_user': 'Usuário do Discord',
+        'player_name': 'Nome do Jogador',
+        'already_registered': 'O jogador já está registrado ou ocorreu um erro.',
+        'player_not_found': 'Jogador Não Encontrado',
+        'not_registered': '{mention} não está registrado no torneio.',
+        'statistics_for': 'Estatísticas de **{player_name}**',
+        'see_leaderboard': '/leaderboard para a classificação',
+        'no_players_min': 'Nenhum jogador com {min_matches}+ partidas ainda!',
+        'wld': 'V/D/E',
+        'kd': 'K/D',
+        'sorted_by': 'Ordenado por {sort} • Visite nosso site para a classificação completa',
+        'match_footer': 'Partida #{match_id} • /correct_match ou /void_match para corrigir erros',
+        'you_are_scheduled': 'Você foi escalado para uma partida do torneio!',
+        'time': 'Horário',
+        'reminder_footer': 'Você receberá um lembrete 5 minutos antes da partida',
+        'match_starts': 'Sua partida de torneio começa {when}!',
+        'good_luck_short': 'Boa sorte!',
+        'language_updated': 'Idioma Atualizado',
+        'language_now': 'Agora vou responder a você em **{language_name}**.'
     }
 }
 
@@ -119,7 +166,201 @@ def get_translation(key, language='en'):
     """Get translation for a key in specified language"""
     return TRANSLATIONS.get(language, TRANSLATIONS['en']).get(key, key)
 
-def get_user_language(user_id):
-    """Get user's preferred language (placeholder for future implementation)"""
-    # This could be expanded to store user language preferences in database
-    return 'en'
+DEFAULT_LANGUAGE = 'en'
+
+# Every catalog, completed with English for keys it does not translate
+CATALOGS = {language: {**TRANSLATIONS[DEFAULT_LANGUAGE], **catalog} for language, catalog in TRANSLATIONS.items()}
+
+def catalog(language):
+    """The full catalog for a language, falling back to English"""
+    return CATALOGS.get(language) or CATALOGS[DEFAULT_LANGUAGE]
+
+def language_for_locale(locale):
+    """Catalog language for a Discord locale such as ``pt-BR``, or English"""
+    language = str(locale or '').split('-')[0].lower()
+    return language if language in CATALOGS else DEFAULT_LANGUAGE
+
+FOOTER = 'Duel Lords Tournament'
+
+# Embed layouts. ``{t[key]}`` is replaced with the catalog text once per
+# language at import; ``{{name}}`` placeholders (and any in the catalog text)
+# are left as format fields, filled per response by render_embed().
+EMBED_TEMPLATES = {
+    'access_denied': {
+        'title': '❌ {t[access_denied]}', 'description': '{t[admin_only]}', 'color': 0xff0000,
+    },
+    'server_info': {
+        'title': '🎮 {t[server_info]}', 'description': '{t[connect_message]}', 'color': 0x00ff00,
+        'fields': (('🌐 {t[ip_address]}', '`{{ip}}`', True),
+                   ('🔌 {t[port]}', '`{{port}}`', True),
+                   ('📋 {t[full_address]}', '`{{ip}}:{{port}}`', False)),
+        'footer': FOOTER + ' • {t[copy_paste]}',
+    },
+    'player_registered': {
+        'title': '✅ {t[player_registered]}', 'description': '{t[registered_description]}', 'color': 0x00ff00,
+        'fields': (('{t[discord_user]}', '{{mention}}', True),
+                   ('{t[player_name]}', '{{player_name}}', True)),
+        'footer': FOOTER,
+    },
+    'registration_failed': {
+        'title': '⚠️ {t[registration_failed]}', 'description': '{t[already_registered]}', 'color': 0xffa500,
+    },
+    'player_not_found': {
+        'title': '❌ {t[player_not_found]}', 'description': '{t[not_registered]}', 'color': 0xff0000,
+    },
+    'player_stats': {
+        'title': '📊 {t[player_stats]}', 'description': '{t[statistics_for]}', 'color': 0x0099ff,
+        'fields': (('🏆 {t[wins]}', '`{{wins}}`', True),
+                   ('💔 {t[losses]}', '`{{losses}}`', True),
+                   ('🤝 {t[draws]}', '`{{draws}}`', True),
+                   ('⚔️ {t[kills]}', '`{{kills}}`', True),
+                   ('💀 {t[deaths]}', '`{{deaths}}`', True),
+                   ('📈 {t[kd_ratio]}', '`{{kd_ratio:.2f}}`', True),
+                   ('🎯 {t[total_matches]}', '`{{total_matches}}`', True),
+                   ('📊 {t[win_rate]}', '`{{win_rate:.1f}}%`', True),
+                   ('🏅 {t[points]}', '`{{points}}`', True)),
+        'footer': FOOTER + ' • {t[see_leaderboard]}',
+    },
+    'leaderboard_empty': {
+        'title': '📊 {t[leaderboard]}', 'description': '{{message}}', 'color': 0xffa500,
+    },
+    'leaderboard': {
+        'title': '🏆 {t[leaderboard]}', 'description': '{{standings}}', 'color': 0xffd700,
+        'footer': FOOTER + ' • {t[sorted_by]}',
+    },
+    'match_result_updated': {
+        'title': '✅ {t[match_result_updated]}', 'description': '{t[stats_updated]}', 'color': 0x00ff00,
+        'fields': (('🏆 {t[winner]}', '{{winner}}', True),
+                   ('💔 {t[defeated]}', '{{loser}}', True),
+                   ('⚔️ {t[combat_stats]}', '{{combat}}', False)),
+        'footer': FOOTER + ' • {t[match_footer]}',
+    },
+    'match_drawn': {
+        'title': '✅ {t[match_result_updated]}', 'description': '{t[stats_updated]}', 'color': 0x00ff00,
+        'fields': (('🤝 {t[result]}', '{t[draw]}', True),
+                   ('⚔️ {t[combat_stats]}', '{{combat}}', False)),
+        'footer': FOOTER + ' • {t[match_footer]}',
+    },
+    'update_failed': {
+        'title': '❌ {t[update_failed]}', 'description': '{t[players_not_registered]}', 'color': 0xff0000,
+    },
+    'players_empty': {
+        'title': '👥 {t[registered_players]}', 'description': '{t[no_players]}', 'color': 0xffa500,
+    },
+    'players': {
+        'title': '👥 {t[registered_players]}', 'description': '{t[total_registered]}: **{{count}}**',
+        'color': 0x0099ff,
+        'fields': (('🎮 {t[players]}', '{{player_list}}', False),),
+        'footer': FOOTER,
+    },
+    'invalid_time': {
+        'title': '❌ {t[invalid_time]}', 'description': '{t[provide_valid_time]}', 'color': 0xff0000,
+    },
+    'scheduling_failed': {
+        'title': '❌ {t[scheduling_failed]}', 'description': '{t[ensure_registered]}', 'color': 0xff0000,
+    },
+    'duel_scheduled': {
+        'title': '⚔️ {t[duel_scheduled]}', 'description': '{t[new_match_scheduled]}', 'color': 0xff6b35,
+        'fields': (('🥊 {t[fighters]}', '**{{player1}}** ⚔️ **{{player2}}**', False),
+                   ('🕐 {t[match_time]}', '<t:{{timestamp}}:F>\n<t:{{timestamp}}:R>', True),
+                   ('🌐 {t[server]}', '`{{ip}}:{{port}}`', True),
+                   ('📱 {t[reminders]}', '{t[reminder_text]}', False)),
+        'footer': FOOTER + ' • {t[good_luck]}',
+    },
+    'duel_scheduled_dm': {
+        'title': '⚔️ {t[duel_scheduled]}', 'description': '{t[you_are_scheduled]}', 'color': 0xff6b35,
+        'fields': (('🥊 {t[opponent]}', '{{opponent}}', True),
+                   ('🕐 {t[time]}', '<t:{{timestamp}}:F>', True),
+                   ('🌐 {t[server]}', '`{{ip}}:{{port}}`', False)),
+        'footer': '{t[reminder_footer]}',
+    },
+    'match_reminder_dm': {
+        'title': '⏰ {t[match_reminder]}', 'description': '{t[match_starts]}', 'color': 0xff9500,
+        'fields': (('🥊 {t[opponent]}', '{{opponent}}', True),
+                   ('🌐 {t[server]}', '`{{ip}}:{{port}}`', True),
+                   ('📋 {t[instructions]}', '{t[join_server]}', False)),
+        'footer': FOOTER + ' • {t[good_luck_short]}',
+    },
+    'language_updated': {
+        'title': '✅ {t[language_updated]}', 'description': '{t[language_now]}', 'color': 0x00ff00,
+        'footer': FOOTER,
+    },
+}
+
+def _resolve(text, t):
+    """A template text with its catalog entries filled in, leaving only per-response placeholders"""
+    text = text.format(t=t)
+    for _, field, _, _ in Formatter().parse(text):
+        # Plain names only: no attribute or index lookups on the values passed in
+        if field is not None and not field.isidentifier():
+            raise ValueError(f"Embed placeholder {field!r} is not a plain name")
+    return text
+
+def _resolve_template(template, t):
+    """An embed layout with every text translated into one language"""
+    return {
+        'title': _resolve(template['title'], t),
+        'color': template['color'],
+        'fields': tuple((_resolve(name, t), _resolve(value, t), inline)
+                        for name, value, inline in template.get('fields', ())),
+        'description': _resolve(template['description'], t) if template.get('description') else None,
+        'footer': _resolve(template['footer'], t) if template.get('footer') else None,
+    }
+
+RESOLVED_TEMPLATES = {language: {name: _resolve_template(template, t) for name, template in EMBED_TEMPLATES.items()}
+                      for language, t in CATALOGS.items()}
+
+def render_embed(name, language, **values):
+    """Embed dict (for discord.Embed.from_dict) of a pre-resolved template in a language"""
+    templates = RESOLVED_TEMPLATES.get(language) or RESOLVED_TEMPLATES[DEFAULT_LANGUAGE]
+    template = templates[name]
+    embed = {
+        'title': template['title'].format_map(values),
+        'color': template['color'],
+        'fields': [{'name': field_name.format_map(values), 'value': value.format_map(values), 'inline': inline}
+                   for field_name, value, inline in template['fields']],
+    }
+    if template['description'] is not None:
+        embed['description'] = template['description'].format_map(values)
+    if template['footer'] is not None:
+        embed['footer'] = {'text': template['footer'].format_map(values)}
+    return embed
+
+class LanguagePreferences:
+    """Users' chosen languages, read through an LRU cache.
+
+    Users without a stored choice get the language of their Discord locale.
+    That absence is cached too, so repeat interactions never query the database.
+    """
+    
+    def __init__(self, db_manager, max_entries=10000):
+        self.db = db_manager
+        self.max_entries = max_entries
+        self._languages = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _remember(self, user_id, language):
+        with self._lock:
+            self._languages[user_id] = language
+            self._languages.move_to_end(user_id)
+            while len(self._languages) > self.max_entries:
+                self._languages.popitem(last=False)
+    
+    def get(self, user_id, locale=None):
+        """A user's language: their stored choice, else their locale's"""
+        user_id = str(user_id)
+        with self._lock:
+            language = self._languages.get(user_id)
+            if language is not None:
+                self._languages.move_to_end(user_id)
+        if language is None:
+            language = self.db.get_user_language(user_id) or ''
+            self._remember(user_id, language)
+        return language or language_for_locale(locale)
+    
+    def set(self, user_id, language):
+        """Store a user's language choice"""
+        if language not in CATALOGS or not self.db.set_user_language(str(user_id), language):
+            return False
+        self._remember(str(user_id), language)
+        return True
@@ -1,18 +1,207 @@
-from flask import render_template, jsonify, request
+from flask import render_template, jsonify, request, g, abort, Response, stream_with_context
 from app import app, db, Player, Match
-from database import DatabaseManager
+from database import (DatabaseManager, LEADERBOARD_SORTS, MATCH_RESULTS, add_external_change_listener,
+                      add_match_listener, json_default, parse_player_csv)
+from snapshot import get_change_feed, get_snapshot_store
+import tracing
+from assets import init_assets, compress, negotiate_encoding, MIN_COMPRESS_SIZE
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import wraps
+import hmac
+import json
 import logging
+import os
+import queue
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
-db_manager = DatabaseManager()
+# The default tournament; guild tournaments are served under /g/<guild_id>/
+db_manager = DatabaseManager.for_tenant(None)
+asset_cache = init_assets(app)
+snapshots = get_snapshot_store(db_manager)
+change_feed = get_change_feed(snapshots)
+
+# Seconds between keep-alive comments on idle event streams
+STREAM_HEARTBEAT = 15
+SSE_KEEPALIVE = ": keep-alive\n\n"
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def sse_event(event, data, event_id=None):
+    """Format one Server-Sent Events message"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, default=json_default)}\n\n"
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one computation.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result instead of repeating the work.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+        try:
+            result = fn()
+            call.set_result(result)
+            return result
+        except Exception as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+api_flight = SingleFlight()
+
+def encode_json(data):
+    """Encode data as JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, default=json_default)
+    return json.dumps(data, default=json_default, separators=(',', ':')).encode()
+
+class EncodedBody:
+    """A JSON body encoded once for a data version, with compressed copies made on first use"""
+    
+    def __init__(self, version, data):
+        self.version = version
+        self.data = data
+        self._encoded = {}
+    
+    def encoded(self, encoding):
+        if encoding is None or len(self.data) < MIN_COMPRESS_SIZE:
+            return None
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress(self.data, encoding)
+        return body
+
+class BodyCache:
+    """Least recently used encoded bodies by request key, each valid for one data version"""
+    
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, version):
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is None or body.version != version:
+                return None
+            self._bodies.move_to_end(key)
+            return body
+    
+    def put(self, key, body):
+        with self._lock:
+            self._bodies[key] = body
+            self._bodies.move_to_end(key)
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+
+json_bodies = BodyCache()
+
+def send_body(body):
+    """Response for an EncodedBody, in the best compressed form the client accepts"""
+    encoding = negotiate_encoding()
+    data = body.encoded(encoding)
+    response = app.response_class(data or body.data, mimetype='application/json')
+    if data is not None:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def json_response(key, build):
+    """Serve JSON built by ``build()``, encoded once per data version and shared by every request"""
+    version = g.db_manager.data_version
+    key = (g.db_manager.db_path, key)
+    body = json_bodies.get(key, version)
+    if body is None:
+        def build_body():
+            # Cached before the flight ends, so a late request hits the cache instead of building again
+            encoded = EncodedBody(version, encode_json(build()))
+            json_bodies.put(key, encoded)
+            return encoded
+        # Concurrent misses for the same key wait for one build
+        body = api_flight.do((key, version), build_body)
+    return send_body(body)
+
+def tenant_route(rule, **options):
+    """Register a view for the default tournament at ``rule`` and for each guild at /g/<guild_id>``rule``"""
+    def decorate(view):
+        app.route(rule, **options)(view)
+        app.route(f'/g/<int:guild_id>{rule}', **options)(view)
+        return view
+    return decorate
+
+@app.url_value_preprocessor
+def pull_tenant(endpoint, values):
+    g.tenant_id = values.pop('guild_id', None) if values else None
+
+@app.url_defaults
+def add_tenant(endpoint, values):
+    # url_for() inside a guild's pages stays within that guild
+    if g.get('tenant_id') is not None and 'guild_id' not in values \
+            and app.url_map.is_endpoint_expecting(endpoint, 'guild_id'):
+        values['guild_id'] = g.tenant_id
+
+@app.context_processor
+def tenant_context():
+    return {'tenant_prefix': f"/g/{g.tenant_id}" if g.get('tenant_id') is not None else ''}
 
-@app.route('/')
+@app.before_request
+def start_request_trace():
+    route = request.url_rule.rule if request.url_rule else request.path
+    g.trace_span = tracing.begin(f"{request.method} {route}", tracing.SPAN_KIND_SERVER,
+                                 {'http.method': request.method, 'http.route': route,
+                                  'tenant.id': g.get('tenant_id')}, root=True)
+
+@app.before_request
+def select_tenant():
+    """Route the request to its tournament's database, snapshot cache and change feed"""
+    tenant_id = g.get('tenant_id')
+    if tenant_id is None:
+        g.db_manager, g.snapshots = db_manager, snapshots
+        return
+    g.db_manager = DatabaseManager.for_tenant(tenant_id, create=False)
+    if g.db_manager is None:
+        abort(404)
+    g.snapshots = get_snapshot_store(g.db_manager)
+
+@app.after_request
+def record_response_status(response):
+    if g.get('trace_span') is not None:
+        g.trace_span.set_attribute('http.status_code', response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request_trace(error):
+    if g.get('trace_span') is not None:
+        g.trace_span.finish(error)
+
+@tenant_route('/')
 def index():
     """Home page"""
     try:
-        total_players = len(db_manager.get_all_players())
-        recent_matches = db_manager.get_recent_matches(5)
-        top_players = db_manager.get_leaderboard(3)
+        snapshot = g.snapshots.current()
+        total_players = snapshot.total_players
+        recent_matches = snapshot.latest_matches(5)
+        top_players = snapshot.top_players(3)
         
         return render_template('index.html', 
                              total_players=total_players,
@@ -25,22 +214,23 @@ def index():
                              recent_matches=[],
                              top_players=[])
 
-@app.route('/leaderboard')
+@tenant_route('/leaderboard')
 def leaderboard():
     """Leaderboard page"""
     try:
-        players = db_manager.get_leaderboard(50)
+        players = g.snapshots.current().top_players(50)
         return render_template('leaderboard.html', players=players)
     except Exception as e:
         logger.error(f"Error loading leaderboard: {e}")
         return render_template('leaderboard.html', players=[])
 
-@app.route('/players')
+@tenant_route('/players')
 def players():
     """All players page"""
     try:
-        all_players = db_manager.get_all_players()
-        recent_matches = db_manager.get_recent_matches(20)
+        snapshot = g.snapshots.current()
+        all_players = snapshot.players
+        recent_matches = snapshot.latest_matches(20)
         return render_template('players.html', 
                              players=all_players,
                              recent_matches=recent_matches)
@@ -50,43 +240,297 @@ def players():
                              players=[],
                              recent_matches=[])
 
-@app.route('/api/stats')
+@tenant_route('/api/stats')
 def api_stats():
     """API endpoint for tournament statistics"""
     try:
-        total_players = len(db_manager.get_all_players())
-        recent_matches = db_manager.get_recent_matches(10)
-        top_players = db_manager.get_leaderboard(10)
+        def build():
+            snapshot = g.snapshots.current()
+            server_ip, server_port = g.db_manager.get_server_address()
+            return {
+                'total_players': snapshot.total_players,
+                'recent_matches': snapshot.latest_matches(10),
+                'top_players': snapshot.top_players(10),
+                'server_ip': server_ip,
+                'server_port': server_port
+            }
         
-        return jsonify({
-            'total_players': total_players,
-            'recent_matches': recent_matches,
-            'top_players': top_players,
-            'server_ip': '18.228.228.44',
-            'server_port': '3827'
-        })
+        return json_response('stats', build)
     except Exception as e:
         logger.error(f"Error in API stats: {e}")
         return jsonify({'error': 'Failed to load statistics'}), 500
 
-@app.route('/api/leaderboard')
+@tenant_route('/api/leaderboard')
 def api_leaderboard():
     """API endpoint for leaderboard data"""
     try:
         limit = request.args.get('limit', 20, type=int)
-        players = db_manager.get_leaderboard(limit)
-        return jsonify({'players': players})
+        sort = request.args.get('sort', 'points')
+        min_matches = request.args.get('min_matches', 0, type=int)
+        if sort not in LEADERBOARD_SORTS:
+            return jsonify({'error': f"sort must be one of: {', '.join(LEADERBOARD_SORTS)}"}), 400
+        
+        if sort == 'points' and min_matches <= 0:
+            build = lambda: {'players': g.snapshots.current().top_players(limit)}
+        else:
+            build = lambda: {'players': g.db_manager.get_leaderboard(limit, sort, min_matches)}
+        return json_response(('leaderboard', limit, sort, min_matches), build)
     except Exception as e:
         logger.error(f"Error in API leaderboard: {e}")
         return jsonify({'error': 'Failed to load leaderboard'}), 500
 
-@app.route('/health')
+@tenant_route('/api/players/search')
+def api_player_search():
+    """API endpoint for player name search with prefix and fuzzy matching"""
+    try:
+        query = request.args.get('q', '').strip()
+        limit = request.args.get('limit', 10, type=int)
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        
+        return json_response(('search', query, limit),
+                             lambda: {'query': query, 'players': g.db_manager.search_players(query, limit)})
+    except Exception as e:
+        logger.error(f"Error in API player search: {e}")
+        return jsonify({'error': 'Failed to search players'}), 500
+
+@tenant_route('/api/player/<discord_id>/timeline')
+def api_player_timeline(discord_id):
+    """API endpoint for a player's daily progress, served from the rollup table"""
+    try:
+        days = min(max(request.args.get('days', 90, type=int), 1), 365)
+        return json_response(('timeline', discord_id, days),
+                             lambda: {'discord_id': discord_id,
+                                      'days': g.db_manager.get_player_timeline(discord_id, days)})
+    except Exception as e:
+        logger.error(f"Error in API player timeline: {e}")
+        return jsonify({'error': 'Failed to load player timeline'}), 500
+
+MAX_SUGGESTIONS = 25
+
+class PlayerNotFound(Exception):
+    """Raised by a body builder for an unregistered player; nothing is cached"""
+
+@tenant_route('/api/player/<discord_id>/opponents')
+def api_suggest_opponents(discord_id):
+    """API endpoint suggesting the closest-rated opponents a player has not met recently"""
+    try:
+        limit = min(max(request.args.get('limit', 5, type=int), 1), MAX_SUGGESTIONS)
+        
+        def build():
+            suggestions = g.snapshots.matchmaking().suggest(discord_id, limit)
+            if suggestions is None:
+                raise PlayerNotFound(discord_id)
+            return {'discord_id': discord_id, 'opponents': suggestions}
+        
+        return json_response(('opponents', discord_id, limit), build)
+    except PlayerNotFound:
+        return jsonify({'error': 'Player not found'}), 404
+    except Exception as e:
+        logger.error(f"Error in API opponent suggestions: {e}")
+        return jsonify({'error': 'Failed to suggest opponents'}), 500
+
+MAX_H2H_PLAYERS = 25
+
+def head_to_head_matrix(limit):
+    """Head-to-head records among the top ``limit`` players, row player against column player"""
+    players = [{'discord_id': p['discord_id'], 'player_name': p['player_name'], 'points': p['points']}
+               for p in g.snapshots.current().top_players(limit)]
+    index = {p['discord_id']: i for i, p in enumerate(players)}
+    matrix = [[None] * len(players) for _ in players]
+    for record in g.db_manager.get_head_to_head(index):
+        matrix[index[record['player_id']]][index[record['opponent_id']]] = {
+            'matches': record['matches'],
+            'wins': record['wins'],
+            'losses': record['losses'],
+            'draws': record['draws'],
+            'kill_diff': record['kill_diff'],
+        }
+    return {'players': players, 'matrix': matrix}
+
+@tenant_route('/h2h')
+def head_to_head():
+    """Head-to-head heatmap page for the top players"""
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 2), MAX_H2H_PLAYERS)
+        return render_template('head_to_head.html', limit=limit, **head_to_head_matrix(limit))
+    except Exception as e:
+        logger.error(f"Error loading head-to-head page: {e}")
+        return render_template('head_to_head.html', limit=0, players=[], matrix=[])
+
+@tenant_route('/api/h2h')
+def api_head_to_head():
+    """API endpoint for the head-to-head matrix of the top players"""
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 2), MAX_H2H_PLAYERS)
+        return json_response(('h2h', limit), lambda: head_to_head_matrix(limit))
+    except Exception as e:
+        logger.error(f"Error in API head-to-head: {e}")
+        return jsonify({'error': 'Failed to load head-to-head records'}), 500
+
+# Standings of ended seasons only change through match corrections, so their
+# bodies are kept until one touches that season
+closed_season_bodies = {}
+MAX_SEASON_LIMIT = 100
+CLOSED_SEASON_CACHE = 'public, max-age=3600'
+
+def forget_season_bodies(db_path, match):
+    for key in [key for key in closed_season_bodies if key[:2] == (db_path, match['season_id'])]:
+        closed_season_bodies.pop(key, None)
+
+def forget_all_season_bodies(db_path):
+    for key in [key for key in closed_season_bodies if key[0] == db_path]:
+        closed_season_bodies.pop(key, None)
+
+add_match_listener(forget_season_bodies)
+add_external_change_listener(forget_all_season_bodies)
+
+@tenant_route('/api/seasons')
+def api_seasons():
+    """API endpoint listing all seasons"""
+    try:
+        return json_response('seasons', lambda: {'seasons': g.db_manager.get_seasons()})
+    except Exception as e:
+        logger.error(f"Error in API seasons: {e}")
+        return jsonify({'error': 'Failed to load seasons'}), 500
+
+@tenant_route('/api/seasons/<int:season_id>/leaderboard')
+def api_season_leaderboard(season_id):
+    """API endpoint for one season's leaderboard"""
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_SEASON_LIMIT)
+        cache_key = (g.db_manager.db_path, season_id, limit)
+        body = closed_season_bodies.get(cache_key)
+        if body is None:
+            season = next((s for s in g.db_manager.get_seasons() if s['id'] == season_id), None)
+            if season is None:
+                return jsonify({'error': 'Season not found'}), 404
+            build = lambda: {'season': season, 'players': g.db_manager.get_season_leaderboard(season_id, limit)}
+            if not season['ended_at']:
+                return json_response(('season_leaderboard', season_id, limit), build)
+            body = closed_season_bodies[cache_key] = EncodedBody(None, encode_json(build()))
+        
+        response = send_body(body)
+        response.headers['Cache-Control'] = CLOSED_SEASON_CACHE
+        return response
+    except Exception as e:
+        logger.error(f"Error in API season leaderboard: {e}")
+        return jsonify({'error': 'Failed to load season leaderboard'}), 500
+
+# Admin API endpoints are disabled unless ADMIN_API_TOKEN is set
+ADMIN_API_TOKEN = os.environ.get("ADMIN_API_TOKEN")
+
+def admin_required(view):
+    """Require ``Authorization: Bearer <ADMIN_API_TOKEN>`` on a route"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        # compare_digest rejects non-ASCII str, so compare the UTF-8 bytes
+        if not ADMIN_API_TOKEN or not hmac.compare_digest(supplied.encode(), ADMIN_API_TOKEN.encode()):
+            return jsonify({'error': 'Admin token required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+MAX_BULK_PLAYERS = 5000
+
+@tenant_route('/api/players/bulk', methods=['POST'])
+@admin_required
+def api_register_bulk():
+    """Admin API endpoint to register many players from JSON or CSV"""
+    if request.mimetype == 'text/csv':
+        players, invalid = parse_player_csv(request.get_data(as_text=True))
+    else:
+        data = request.get_json(silent=True)
+        entries = data.get('players') if isinstance(data, dict) else None
+        if entries is None:
+            entries = []
+        if not isinstance(entries, list):
+            return jsonify({'error': 'players must be a list'}), 400
+        not_objects = [index for index, entry in enumerate(entries) if not isinstance(entry, dict)]
+        if not_objects:
+            return jsonify({'error': 'players entries must be objects', 'invalid': not_objects}), 400
+        bad_names = [index for index, entry in enumerate(entries)
+                     if entry.get('discord_name') is not None and not isinstance(entry['discord_name'], str)]
+        if bad_names:
+            return jsonify({'error': 'discord_name must be a string', 'invalid': bad_names}), 400
+        players, invalid = [], []
+        for index, entry in enumerate(entries):
+            discord_id = str(entry.get('discord_id', ''))
+            player_name = str(entry.get('player_name', '')).strip() if discord_id else ''
+            if not discord_id.isdigit() or not player_name:
+                invalid.append(index)
+                continue
+            players.append((discord_id, player_name, entry.get('discord_name') or player_name))
+    
+    if not players:
+        return jsonify({'error': 'No valid players supplied', 'invalid': invalid}), 400
+    if len(players) > MAX_BULK_PLAYERS:
+        return jsonify({'error': f"At most {MAX_BULK_PLAYERS} players per request"}), 400
+    
+    counts = g.db_manager.add_players(players)
+    if counts is None:
+        return jsonify({'error': 'Failed to register players'}), 500
+    return jsonify({**counts, 'invalid': invalid})
+
+@tenant_route('/api/matches/<int:match_id>/void', methods=['POST'])
+@admin_required
+def api_void_match(match_id):
+    """Admin API endpoint to void a recorded match"""
+    match = g.db_manager.void_match(match_id)
+    if match is None:
+        return jsonify({'error': 'Match not found'}), 404
+    return jsonify({'voided': match})
+
+@tenant_route('/api/matches/<int:match_id>/correct', methods=['POST'])
+@admin_required
+def api_correct_match(match_id):
+    """Admin API endpoint to replace a recorded match's result"""
+    data = request.get_json(silent=True) or {}
+    if data.get('result') not in MATCH_RESULTS:
+        return jsonify({'error': f"result must be one of: {', '.join(MATCH_RESULTS)}"}), 400
+    try:
+        # Counts left out keep the match's recorded values
+        stats = [None if data.get(field) is None else int(data[field]) for field in
+                 ('player1_kills', 'player1_deaths', 'player2_kills', 'player2_deaths')]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'kills and deaths must be integers'}), 400
+    
+    match = g.db_manager.correct_match(match_id, data['result'], *stats)
+    if match is None:
+        return jsonify({'error': 'Match not found'}), 404
+    return jsonify({'corrected': match})
+
+@tenant_route('/api/stream')
+def api_stream():
+    """Server-Sent Events stream of leaderboard, match and registration changes"""
+    feed = get_change_feed(g.snapshots)
+    snapshot_store = g.snapshots
+    subscriber = feed.subscribe()
+    
+    def events():
+        try:
+            yield sse_event('hello', {'version': snapshot_store.current().version})
+            while subscriber in feed:
+                try:
+                    change = subscriber.get(timeout=STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield SSE_KEEPALIVE
+                    continue
+                yield sse_event('change', change, change['version'])
+        finally:
+            feed.unsubscribe(subscriber)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+@tenant_route('/health')
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'bot': 'Duel Lords',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'outbox': g.db_manager.get_outbox_depth(),
+        'tenants': len(DatabaseManager.tenant_ids())
     })
 
 @app.errorhandler(404)